@@ -1,45 +1,125 @@
-import groq
-from config import GROQ_API_KEY, GROQ_MODEL
+import json
+import re
+import threading
+from config import (GROQ_API_KEY, GROQ_MODEL, CLASSIFY_BATCH_SIZE, GROQ_REQUESTS_PER_MINUTE,
+                    GROQ_TOKENS_PER_MINUTE, GROQ_BURST, EMAIL_CACHE_ENABLED, EMAIL_MAX_TOKENS,
+                    EMAIL_SNIPPET_MAX_TOKENS)
+from llm_cache import cache_key, get_cache
+from ratelimit import TokenBucket
+import metrics
+
+_client = None
+_client_lock = threading.Lock()
+
+# Shared by every thread that talks to Groq, so concurrent callers stay under the RPM limit
+groq_limiter = TokenBucket(GROQ_REQUESTS_PER_MINUTE / 60, GROQ_BURST)
+
+
+def get_client():
+    """The Groq client, created on first use — the groq SDK is slow to import."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            import groq
+            _client = groq.Groq(api_key=GROQ_API_KEY)
+        return _client
+
+
+def _chat(op: str, **kwargs):
+    groq_limiter.acquire()
+    with metrics.timed("groq", op):
+        response = get_client().chat.completions.create(**kwargs)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        metrics.record_tokens(kwargs.get("model", ""), usage.prompt_tokens, usage.completion_tokens, op)
+    return response
+
+
+def print_usage(op: str = "generate"):
+    """
+    One line on tokens and latency per `op` call so far, and how many calls a
+    minute Groq's request and token limits allow at that size.
+    """
+    st = metrics.llm_summary().get(op)
+    if not st:
+        return
+    per_call = st["avg_prompt"] + st["avg_completion"]
+    limits   = []   # calls per minute each limit allows (0 = no limit)
+    if GROQ_REQUESTS_PER_MINUTE > 0:
+        limits.append(GROQ_REQUESTS_PER_MINUTE)
+    if GROQ_TOKENS_PER_MINUTE > 0 and per_call:
+        limits.append(GROQ_TOKENS_PER_MINUTE / per_call)
+
+    line = (f"[AI] {st['count']} {op} call(s), {st['prompt_tokens'] + st['completion_tokens']} tokens: "
+            f"avg {st['avg_prompt']:.0f} prompt + {st['avg_completion']:.0f} completion, "
+            f"p50 {st['p50_ms'] / 1000:.2f}s.")
+    if limits:
+        line += f" Groq limits allow ~{min(limits):.0f} a minute at this size."
+    print(line)
+
+
+# ─────────────────────────────────────────────
+# Prompts — the instructions are a fixed system message built once; each
+# call only adds a short user message with the business / reply.
+# ─────────────────────────────────────────────
+EMAIL_SYSTEM_PROMPT = """You are Kunal from Devark Studios (https://devark.studio), a web design agency that builds high-converting websites for brands. You have worked with Shark Tank brands like Kunafa Mafias.
+
+Write a short, professional, personalized cold email to the local business described by the user. It has no website yet (or needs an upgrade). Offer to build a professional website that establishes credibility and drives customers.
 
-client = groq.Groq(api_key=GROQ_API_KEY)
+Rules:
+- Under 150 words; professional, confident, helpful tone
+- Mention "We build websites for brands" and "Shark Tank brands like Kunafa Mafias"
+- Use the business's name to show research
+- Value prop: "We can build a premium website that makes <business name> look professional."
+- Call to action: "Reply to this email if you're interested in connecting further."
+- No bullet points or numbered lists
+- Sign off as: Kunal, Devark Studios (https://devark.studio)
 
-def generate_cold_email(business_name: str, niche: str, city: str, snippet: str) -> dict:
-    prompt = f"""You are Kunal from Devark Studios (https://devark.studio), a web design agency that builds high-converting websites for brands.
-You have worked with Shark Tank brands like Kunafa Mafias.
+Output the subject line, then a line that says exactly "---BODY---", then the email body. Nothing else."""
 
-Write a short, professional, personalized cold email to a local business that does not have a website yet (or needs an upgrade).
-Offer to build them a professional website that establishes credibility and drives customers.
+EMAIL_USER_TEMPLATE = "Name: {name}\nType: {niche}\nCity: {city}\nAbout them (from search): {snippet}"
 
-Business details:
-- Name: {business_name}
-- Type/Niche: {niche}
-- City: {city}
-- About them (from search): {snippet}
+WORD_RE = re.compile(r"\S+")
 
-Rules:
-- Keep it under 150 words
-- Tone: Professional, confident, but helpful
-- Mention: "We build websites for brands" and reference "Shark Tank brands like Kunafa Mafias" to establish authority
-- Mention their specific business name to show research
-- Value Prop: "We can build a premium website that makes {business_name} look professional."
-- Call to Action: "Reply to this email if you're interested in connecting further."
-- Do NOT use bullet points or numbered lists
-- Sign off as: Kunal, Devark Studios (https://devark.studio)
 
-Output ONLY two things, separated by a line that says exactly "---BODY---":
-First line: the subject line
-Then ---BODY---
-Then: the email body
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Whole words from the start of `text` (whitespace collapsed) that fit in
+    roughly max_tokens. Tokens are estimated at ~4 characters each, at least
+    one per word; the real counts come back in each response's usage.
+    """
+    words, used = [], 0
+    for word in WORD_RE.findall(text):
+        used += max(1, (len(word) + 3) // 4)
+        if used > max_tokens:
+            return " ".join(words) + " …"
+        words.append(word)
+    return " ".join(words)
 
-Do not add any extra commentary."""
 
-    response = client.chat.completions.create(
+def generate_cold_email(business_name: str, niche: str, city: str, snippet: str,
+                        use_cache: bool = EMAIL_CACHE_ENABLED) -> dict:
+    user = EMAIL_USER_TEMPLATE.format(name=business_name, niche=niche, city=city,
+                                      snippet=truncate_to_tokens(snippet, EMAIL_SNIPPET_MAX_TOKENS))
+    request = dict(
         model=GROQ_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        max_tokens=300,
+        messages=[{"role": "system", "content": EMAIL_SYSTEM_PROMPT},
+                  {"role": "user",   "content": user}],
+        max_tokens=EMAIL_MAX_TOKENS,
         temperature=0.7,
     )
 
+    # Same prompt + model + settings → reuse the email we already paid for
+    key = cache_key(**request)
+    if use_cache:
+        cached = get_cache().get(key)
+        if cached:
+            print(f"[AI] Reusing cached email for '{business_name}'")
+            print(f"     Subject: {cached['subject']}")
+            return cached
+
+    response = _chat("generate", **request)
+
     raw = response.choices[0].message.content.strip()
 
     if "---BODY---" in raw:
@@ -51,29 +131,44 @@ Do not add any extra commentary."""
         subject = lines[0].strip()
         body    = lines[1].strip() if len(lines) > 1 else raw
 
+    if use_cache:
+        get_cache().put(key, subject, body)
+
     print(f"[AI] Generated email for '{business_name}'")
     print(f"     Subject: {subject}")
     return {"subject": subject, "body": body}
 
 
-def classify_reply(reply_text: str, business_name: str) -> str:
-    prompt = f"""A freelancer sent a cold email to a business called "{business_name}".
-The business replied with this message:
-
----
-{reply_text}
----
+CLASSIFY_SYSTEM_PROMPT = """A freelancer sent a cold email to a business, and the user message is the business's reply, between the dashed lines.
 
-Classify this reply into EXACTLY one of these three categories:
+Classify the reply into EXACTLY one of these three categories:
 - interested        (they want to talk, ask for details, or say yes)
 - not_interested    (they decline, say no, or ignore the offer)
 - needs_followup    (ambiguous, they asked a question, or need more info)
 
 Respond with ONLY the single word category. Nothing else."""
 
-    response = client.chat.completions.create(
+CLASSIFY_BATCH_SYSTEM_PROMPT = """A freelancer sent cold emails to several businesses. Each <reply> in the user message is one business's response.
+
+Classify EACH reply into EXACTLY one of these three categories:
+- interested        (they want to talk, ask for details, or say yes)
+- not_interested    (they decline, say no, or ignore the offer)
+- needs_followup    (ambiguous, they asked a question, or need more info)
+
+Respond with ONLY a JSON object mapping every reply id to its category, e.g. {"1": "interested", "2": "not_interested"}. Nothing else."""
+
+CLASSIFY_USER_TEMPLATE = 'Business: "{business}"\n---\n{reply}\n---'
+REPLY_BLOCK_TEMPLATE   = '<reply id="{id}" business="{business}">\n{reply}\n</reply>'
+REPLY_MAX_TOKENS       = 500   # per-reply budget inside a classification prompt
+
+
+def classify_reply(reply_text: str, business_name: str) -> str:
+    response = _chat(
+        "classify",
         model=GROQ_MODEL,
-        messages=[{"role": "user", "content": prompt}],
+        messages=[{"role": "system", "content": CLASSIFY_SYSTEM_PROMPT},
+                  {"role": "user",   "content": CLASSIFY_USER_TEMPLATE.format(
+                      business=business_name, reply=truncate_to_tokens(reply_text, REPLY_MAX_TOKENS))}],
         max_tokens=10,
         temperature=0.0,
     )
@@ -85,4 +180,63 @@ Respond with ONLY the single word category. Nothing else."""
         classification = "needs_followup"
 
     print(f"[AI] Reply from '{business_name}' classified as: {classification}")
-    return classification
\ No newline at end of file
+    return classification
+
+
+VALID_LABELS = {"interested", "not_interested", "needs_followup"}
+
+
+def _classify_batch(replies: list[dict]) -> dict[str, str]:
+    blocks = "\n\n".join(
+        REPLY_BLOCK_TEMPLATE.format(id=r["id"], business=r["business_name"].replace('"', "'"),
+                                    reply=truncate_to_tokens(r["text"], REPLY_MAX_TOKENS))
+        for r in replies
+    )
+
+    response = _chat(
+        "classify_batch",
+        model=GROQ_MODEL,
+        messages=[{"role": "system", "content": CLASSIFY_BATCH_SYSTEM_PROMPT},
+                  {"role": "user",   "content": blocks}],
+        max_tokens=20 + 15 * len(replies),
+        temperature=0.0,
+        response_format={"type": "json_object"},
+    )
+
+    raw   = response.choices[0].message.content.strip()
+    match = re.search(r"\{.*\}", raw, re.DOTALL)
+    if not match:
+        raise ValueError(f"no JSON object in reply: {raw[:80]!r}")
+    labels = json.loads(match.group(0))
+
+    return {str(k): str(v).strip().lower() for k, v in labels.items()
+            if str(v).strip().lower() in VALID_LABELS}
+
+
+def classify_replies(replies: list[dict]) -> dict[str, str]:
+    """
+    Classify many replies with as few LLM calls as possible.
+    `replies` is a list of {"id", "business_name", "text"} dicts; returns
+    {id: category}. Replies are sent CLASSIFY_BATCH_SIZE per request, and any
+    reply whose label is missing or unparseable is retried on its own with
+    classify_reply().
+    """
+    labels = {}
+    for i in range(0, len(replies), CLASSIFY_BATCH_SIZE):
+        batch = replies[i:i + CLASSIFY_BATCH_SIZE]
+
+        if len(batch) > 1:
+            try:
+                got = _classify_batch(batch)
+                for r in batch:
+                    if str(r["id"]) in got:
+                        labels[r["id"]] = got[str(r["id"])]
+                        print(f"[AI] Reply from '{r['business_name']}' classified as: {labels[r['id']]}")
+            except Exception as e:
+                print(f"[AI] Batch classification failed ({e}). Falling back to one call per reply.")
+
+        for r in batch:
+            if r["id"] not in labels:
+                labels[r["id"]] = classify_reply(r["text"], r["business_name"])
+
+    return labels
\ No newline at end of file
@@ -0,0 +1,243 @@
+"""
+bench_e2e.py — Offline end-to-end benchmark of the scrape / email / poll /
+full modes, with every external service replaced by a local stand-in
+(see standins.py). Reports businesses per second and p50/p99 latency per
+stage for each mode and size (--calls adds the agent's own metrics.py view).
+
+    python benchmarks/bench_e2e.py [--modes scrape email poll full] [--sizes 100 1000 10000]
+                                   [--llm-ms 50] [--smtp-ms 5] ... [--set KEY=VALUE ...]
+
+Each (mode, size) runs in a fresh subprocess with its own temp CACHE_DIR, so
+runs never share caches. example_config.py is the base config; rate limits
+are switched off (they'd just measure the limiter) unless --set overrides them.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import importlib.util
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+AGENT_ADDRESS     = "agent@example.com"
+RESULTS_PER_QUERY = 20
+
+
+# ─────────────────────────────────────────────
+# Child: one (mode, size) run
+# ─────────────────────────────────────────────
+def load_config(cache_dir: str, overrides: dict, combos: int):
+    spec   = importlib.util.spec_from_file_location("config", os.path.join(ROOT, "example_config.py"))
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+
+    config.CACHE_DIR                   = cache_dir
+    config.GMAIL_ADDRESS               = AGENT_ADDRESS
+    config.SEARCH_RATE_PER_SECOND      = 0
+    config.ENRICH_HOST_RATE_PER_SECOND = 0
+    config.GROQ_REQUESTS_PER_MINUTE    = 0
+    config.EMAIL_SEND_RATE_PER_MINUTE  = 0
+    config.SENDER_DAILY_LIMIT          = 0
+    config.RESULTS_PER_QUERY           = RESULTS_PER_QUERY
+    config.COMBOS_PER_CYCLE            = combos
+    config.NICHES                      = [f"niche{i}" for i in range(combos)]
+    config.CITIES                      = [f"city{i}" for i in range(combos)]
+    for key, value in overrides.items():
+        setattr(config, key, value)
+
+    sys.modules["config"] = config
+    return config
+
+
+def wants_reply(address: str, reply_rate: float) -> bool:
+    bucket = int(hashlib.md5(address.encode()).hexdigest(), 16) % 1000
+    return bucket < reply_rate * 1000
+
+
+QUOTED_COLD_EMAIL = (
+    "\n\nOn Mon, 6 Jan 2025 at 10:02, Agent <agent@example.com> wrote:\n"
+    + "> Hi there, I noticed your business doesn't have a website yet and I'd\n"
+      "> love to help you get found online. Would you be open to a quick chat?\n" * 6
+)
+
+
+def reply_for(address: str) -> tuple[str, str]:
+    """About a third of the scripted replies decline; the rest are leads. All quote our email."""
+    subject = "Re: Quick question about your website"
+    if int(hashlib.md5(address.encode()).hexdigest(), 16) % 3 == 0:
+        return subject, "No thanks, we're not interested right now." + QUOTED_COLD_EMAIL
+    return subject, "Hi! Yes we're interested, can you share pricing?" + QUOTED_COLD_EMAIL
+
+
+def seed_row(i: int, status: str) -> list:
+    name = f"Seeded Business {i}"
+    addr = f"owner{i}@seeded{i}.example.com"
+    return [name, "cafe", "Testville", f"https://www.facebook.com/seeded{i}",
+            f"Cozy cafe. Write to {addr}", "No", status,
+            "Yes" if status == "Contacted" else "No",
+            addr if status == "Contacted" else "", ""]
+
+
+def run_child(mode: str, rows: int, latency: dict, reply_rate: float, overrides: dict,
+              attach_kb: int = 0) -> dict:
+    workdir = tempfile.mkdtemp(prefix="bench-e2e-")
+    os.chdir(workdir)
+    combos = math.ceil(rows / (RESULTS_PER_QUERY * 0.9))
+    config = load_config(os.path.join(workdir, "cache"), overrides, combos)
+
+    import standins
+    import ai
+    import email_sender
+    import enricher
+    import lead_tracker
+    import main
+    import metrics
+    import resolver
+    import scraper
+    import sheets
+
+    timer  = standins.StageTimer()
+    attachment = os.urandom(attach_kb * 1024)
+    sheet  = standins.InMemorySheets(timer, latency["sheets"])
+    imap   = standins.LocalIMAPServer(latency["imap"])
+
+    def on_message(mail_from, rcpts, data):
+        # some recipients of a cold email "reply", which lands in our inbox
+        for rcpt in rcpts:
+            if rcpt != AGENT_ADDRESS and wants_reply(rcpt, reply_rate):
+                imap.mailbox.add_reply(rcpt, *reply_for(rcpt), attachment)
+
+    smtp = standins.LocalSMTPServer(latency["smtp"], on_message)
+
+    # plug the stand-ins into the real entry points
+    scraper.search_provider = lambda: standins.make_fake_ddgs(timer, latency["search"])
+    resolver._lookup        = standins.make_fake_dns_lookup(timer, latency["dns"])
+    fake_http               = standins.make_fake_http(timer, latency["http"])
+    enricher.http_session   = lambda: fake_http
+    ai._client              = standins.CannedGroq(timer, latency["llm"])
+    sheets._service         = sheet
+    email_sender.SMTPSession.send = timer.timed("smtp", email_sender.SMTPSession.send)
+    email_sender._default_session = email_sender.SMTPSession(
+        address=AGENT_ADDRESS, host="127.0.0.1", port=smtp.port, starttls=False)
+    lead_tracker.IMAPSession.fetch_new = timer.timed("imap", lead_tracker.IMAPSession.fetch_new)
+    lead_tracker._sessions[AGENT_ADDRESS] = lead_tracker.IMAPSession(
+        address=AGENT_ADDRESS, host="127.0.0.1", port=imap.port, use_ssl=False)
+
+    header = list(sheets.HEADERS)
+    if mode == "email":
+        sheet.tabs[config.SHEET_ALL_BUSINESSES] = [header] + [seed_row(i, "Pending") for i in range(rows)]
+    elif mode == "poll":
+        sheet.tabs[config.SHEET_ALL_BUSINESSES] = [header] + [seed_row(i, "Contacted") for i in range(rows)]
+        for i in range(rows):
+            row = seed_row(i, "Contacted")
+            if wants_reply(row[8], reply_rate):
+                imap.mailbox.add_reply(row[8], *reply_for(row[8]), attachment)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode in ("scrape", "full"):
+            main.run_scrape_and_store()
+        if mode in ("email", "full"):
+            main.run_email_pending()
+        if mode in ("poll", "full"):
+            main.run_poll_once()
+    wall = time.perf_counter() - start
+
+    all_rows = sheet.tabs.get(config.SHEET_ALL_BUSINESSES, [])[1:]
+    if mode == "poll":
+        processed = len(imap.mailbox.messages)
+    else:
+        processed = len(all_rows)
+
+    return {
+        "mode":        mode,
+        "rows":        rows,
+        "processed":   processed,
+        "wall_s":      wall,
+        "per_sec":     processed / wall if wall else 0.0,
+        "sheets_calls": sheet.calls,
+        "emails_sent": smtp.received,
+        "replies":     len(imap.mailbox.messages),
+        "imap_kb":     imap.bytes_sent / 1024,
+        "stages":      timer.summary(),
+        "calls":       metrics.summary()["calls"],
+    }
+
+
+# ─────────────────────────────────────────────
+# Parent: run the matrix and print a report
+# ─────────────────────────────────────────────
+def parse_overrides(pairs: list[str]) -> dict:
+    overrides = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=["scrape", "email", "poll", "full"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--search-ms", type=float, default=200)
+    parser.add_argument("--dns-ms", type=float, default=10)
+    parser.add_argument("--http-ms", type=float, default=100)
+    parser.add_argument("--llm-ms", type=float, default=50)
+    parser.add_argument("--smtp-ms", type=float, default=5)
+    parser.add_argument("--imap-ms", type=float, default=5)
+    parser.add_argument("--sheets-ms", type=float, default=50)
+    parser.add_argument("--reply-rate", type=float, default=0.2)
+    parser.add_argument("--attach-kb", type=int, default=0,
+                        help="attach a file of this size to every scripted reply")
+    parser.add_argument("--set", nargs="*", default=[], metavar="KEY=VALUE",
+                        help="override a config value (JSON-parsed), e.g. EMAIL_GEN_WORKERS=8")
+    parser.add_argument("--calls", action="store_true",
+                        help="also print the agent-side per-call metrics (see metrics.py)")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    latency = {stage: getattr(args, f"{stage}_ms") / 1000
+               for stage in ("search", "dns", "http", "llm", "smtp", "imap", "sheets")}
+    overrides = parse_overrides(args.set)
+
+    if args.child:
+        mode, rows = args.child[0], int(args.child[1])
+        print(json.dumps(run_child(mode, rows, latency, args.reply_rate, overrides, args.attach_kb)))
+        return
+
+    child_args = sys.argv[1:]
+    for mode in args.modes:
+        for size in args.sizes:
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), *child_args, "--child", mode, str(size)],
+                capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{mode:<7} {size:>6}  FAILED: {proc.stderr.strip().splitlines()[-1]}")
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{r['mode']:<7} rows={r['rows']:<6} processed={r['processed']:<6} "
+                  f"wall={r['wall_s']:7.2f}s  {r['per_sec']:8.1f} biz/s  "
+                  f"sheets_calls={r['sheets_calls']} emails={r['emails_sent']} replies={r['replies']} "
+                  f"imap_kb={r['imap_kb']:.0f}")
+            for stage, st in r["stages"].items():
+                print(f"    {stage:<7} n={st['count']:<6} p50={st['p50_ms']:7.1f} ms  p99={st['p99_ms']:7.1f} ms")
+            if args.calls:
+                for call, st in r["calls"].items():
+                    print(f"    {call:<26} n={st['count']:<6} err={st['errors']:<4} "
+                          f"p50={st['p50_ms']:7.1f} ms  p99={st['p99_ms']:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
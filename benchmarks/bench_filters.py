@@ -0,0 +1,180 @@
+"""
+bench_filters.py — Compare the compiled ResultFilter (keyword regex + domain
+trie) against the original per-keyword / per-domain substring checks over
+synthetic search results.
+
+    python benchmarks/bench_filters.py [--results 100000] [--repeat 3] [--extra 0]
+
+--extra N pads both keyword and domain lists with N synthetic entries, to see
+how each approach scales as the config lists grow.
+
+Each side runs with the domain list it ships with (the old hard-coded list vs.
+SKIP_DOMAINS). Also reports where the two disagree: the old substring test
+also dropped look-alike hosts such as notfacebook.com or
+facebook.com.example.net, and any country-code directory (www.yelp.com.au)
+the compiled filter lets through is listed separately.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+if not os.path.exists(os.path.join(ROOT, "config.py")):
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("config", os.path.join(ROOT, "example_config.py"))
+    sys.modules["config"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules["config"])
+
+from config import SKIP_DOMAINS
+from result_filter import ResultFilter
+
+
+# ─────────────────────────────────────────────
+# The pre-filter-engine implementation, kept here as the baseline
+# ─────────────────────────────────────────────
+LEGACY_KEYWORDS = ["wikipedia", "news", "article", "blog", "how to", "what is", "top 10", "best in"]
+LEGACY_DOMAINS  = ["facebook.com", "instagram.com", "twitter.com",
+                   "yelp.com", "google.com", "maps.google.com",
+                   "justdial.com", "sulekha.com", "indiamart.com",
+                   "urbanclap.com", "urban company", "linkedin.com"]
+
+
+def legacy_extract_domain(url: str, skip=LEGACY_DOMAINS) -> str | None:
+    try:
+        match = re.search(r"https?://([^/\s]+)", url)
+        if match:
+            domain = match.group(1).lower()
+            for s in skip:
+                if s in domain:
+                    return None
+            return domain
+    except Exception:
+        pass
+    return None
+
+
+def legacy_is_noise(title: str, body: str, skip_keywords=LEGACY_KEYWORDS) -> bool:
+    return any(kw in title.lower() or kw in body.lower() for kw in skip_keywords)
+
+
+def legacy_filter(results: list[dict], keywords=LEGACY_KEYWORDS, domains=LEGACY_DOMAINS) -> list[tuple]:
+    kept = []
+    for r in results:
+        title = r["title"]
+        if legacy_is_noise(title, r["body"], keywords):
+            continue
+        kept.append((title, legacy_extract_domain(r["href"], domains)))
+    return kept
+
+
+def compiled_filter(results: list[dict], rf: ResultFilter) -> list[tuple]:
+    kept = []
+    for r in results:
+        title = r["title"]
+        if rf.is_noise(title, r["body"]):
+            continue
+        kept.append((title, rf.extract_domain(r["href"])))
+    return kept
+
+
+# ─────────────────────────────────────────────
+# Synthetic search results
+# ─────────────────────────────────────────────
+WORDS = ("golden bean brew studio fit lens craft corner urban roast pixel family "
+         "dental bakery salon yoga print frame tailor garden florist paws clinic").split()
+NOISE = ["News", "Blog", "Top 10", "How to", "Wikipedia", "What is", "Article", "Best in"]
+HOSTS = [
+    "www.facebook.com", "m.facebook.com", "instagram.com", "www.yelp.com", "maps.google.com",
+    "www.justdial.com", "in.linkedin.com", "twitter.com",
+    "notfacebook.com", "facebook.com.example.net", "myyelp.com",       # look-alikes
+]
+CC_HOSTS = ["www.yelp.com.au", "www.yelp.co.uk", "www.yelp.ca", "google.com.au", "www.google.co.uk"]
+HOSTS   += CC_HOSTS   # country-code directory sites: both filters must drop these
+
+
+def make_results(n: int, seed: int = 7) -> list[dict]:
+    rnd = random.Random(seed)
+    results = []
+    for i in range(n):
+        name = " ".join(rnd.choice(WORDS).title() for _ in range(rnd.randint(2, 4)))
+        title = f"{name} - {rnd.choice(NOISE)}" if rnd.random() < 0.15 else name
+        body = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(15, 40)))
+        if rnd.random() < 0.5:
+            host = rnd.choice(HOSTS)
+        else:
+            host = f"www.{name.replace(' ', '').lower()}{i}.com"
+        results.append({"title": title, "body": body, "href": f"https://{host}/p/{i}"})
+    return results
+
+
+def best_of(repeat: int, fn, *args) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--results", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--extra", type=int, default=0)
+    args = parser.parse_args()
+
+    results  = make_results(args.results)
+    keywords = LEGACY_KEYWORDS + [f"zzkw{i} qq" for i in range(args.extra)]
+    extra    = [f"dir{i}.example" for i in range(args.extra)]
+    domains  = LEGACY_DOMAINS + extra
+
+    start = time.perf_counter()
+    rf = ResultFilter(keywords, list(SKIP_DOMAINS) + extra)
+    build = time.perf_counter() - start
+
+    t_old, old = best_of(args.repeat, legacy_filter, results, keywords, domains)
+    t_new, new = best_of(args.repeat, compiled_filter, results, rf)
+
+    print(f"{args.results} results, {len(keywords)} keywords, "
+          f"{len(domains)} legacy / {len(SKIP_DOMAINS) + len(extra)} compiled domains  "
+          f"(filter built in {build * 1000:.2f} ms)")
+    print(f"  legacy   {t_old * 1000:8.1f} ms  {args.results / t_old:10.0f} results/s  kept={len(old)}")
+    print(f"  compiled {t_new * 1000:8.1f} ms  {args.results / t_new:10.0f} results/s  kept={len(new)}")
+    print(f"  speedup  {t_old / t_new:.1f}x")
+
+    # each half on its own, over every result
+    phases = [
+        ("keywords", lambda: [legacy_is_noise(r["title"], r["body"], keywords) for r in results],
+                     lambda: [rf.is_noise(r["title"], r["body"]) for r in results]),
+        ("domains",  lambda: [legacy_extract_domain(r["href"], domains) for r in results],
+                     lambda: [rf.extract_domain(r["href"]) for r in results]),
+    ]
+    for name, old_fn, new_fn in phases:
+        p_old, _ = best_of(args.repeat, old_fn)
+        p_new, _ = best_of(args.repeat, new_fn)
+        print(f"  {name:<8} legacy {p_old * 1000:7.1f} ms  compiled {p_new * 1000:7.1f} ms  "
+              f"({p_old / p_new:.1f}x)")
+
+    if len(old) != len(new):
+        print("  keyword filtering disagrees!")
+        return
+    diffs = {}
+    for (_, d_old), (_, d_new) in zip(old, new):
+        if d_old != d_new:
+            key = f"legacy={d_old}  compiled={d_new}"
+            diffs[key] = diffs.get(key, 0) + 1
+    for key, n in sorted(diffs.items()):
+        print(f"  {n:6d} result(s) differ: {key}")
+
+    leaked = sorted(h for h in CC_HOSTS if rf.extract_domain(f"https://{h}/") is not None)
+    print(f"  country-code directories kept as websites: {', '.join(leaked) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
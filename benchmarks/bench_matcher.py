@@ -0,0 +1,117 @@
+"""
+bench_matcher.py — Compare the indexed ReplyMatcher against the original
+linear match_reply_to_business scan on synthetic contacted lists / inboxes.
+
+    python benchmarks/bench_matcher.py [--contacted 100 1000 5000] [--emails 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+if not os.path.exists(os.path.join(ROOT, "config.py")):
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("config", os.path.join(ROOT, "example_config.py"))
+    sys.modules["config"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules["config"])
+
+from lead_tracker import ReplyMatcher
+
+
+def legacy_match(email_data: dict, contacted: list[dict]) -> dict | None:
+    """The pre-index implementation, kept here as the baseline."""
+    sender_email = email_data["sender"].lower()
+    subject      = email_data["subject"].lower()
+    body         = email_data["body"].lower()
+
+    for biz in contacted:
+        biz_email = biz.get("email_address", "").lower()
+        biz_name  = biz.get("business_name", "").lower()
+
+        if biz_email and biz_email in sender_email:
+            return biz
+
+        name_words = biz_name.split()[:2]
+        name_short = " ".join(name_words)
+        if len(name_short) > 3 and (name_short in subject or name_short in body):
+            return biz
+
+    return None
+
+
+WORDS = ("golden bean brew studio fit lens craft corner urban roast pixel "
+         "ledger iron pulse thread velvet maple harbor summit cedar").split()
+FILLER = ("thanks for reaching out we might be interested can you send more "
+          "details about pricing and timelines regards").split()
+
+
+def make_contacted(n: int, rng: random.Random) -> list[dict]:
+    contacted = []
+    for i in range(n):
+        name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}{i} {rng.choice(WORDS).title()}"
+        contacted.append({
+            "row_index":     i + 2,
+            "business_name": name,
+            "email_address": f"owner{i}@biz{i}.example.com",
+        })
+    return contacted
+
+
+def make_emails(n: int, contacted: list[dict], rng: random.Random, body_words: int = 400) -> list[dict]:
+    emails = []
+    for _ in range(n):
+        biz  = rng.choice(contacted)
+        body = " ".join(rng.choice(FILLER) for _ in range(body_words))
+        kind = rng.random()
+        if kind < 0.4:      # reply from the address we emailed
+            sender = f"Owner <{biz['email_address']}>"
+        elif kind < 0.8:    # reply from elsewhere that names the business
+            sender = "someone@gmail.com"
+            body  += " " + biz["business_name"]
+        else:               # unrelated mail
+            sender = "newsletter@gmail.com"
+        emails.append({"sender": sender, "subject": "Re: Website for your business", "body": body})
+    return emails
+
+
+def bench(n_contacted: int, n_emails: int, seed: int = 7):
+    rng       = random.Random(seed)
+    contacted = make_contacted(n_contacted, rng)
+    emails    = make_emails(n_emails, contacted, rng)
+
+    t0 = time.perf_counter()
+    expected = [legacy_match(em, contacted) for em in emails]
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    matcher = ReplyMatcher(contacted)
+    build_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = [matcher.match(em) for em in emails]
+    match_s = time.perf_counter() - t0
+
+    agree = sum(a is b for a, b in zip(expected, got))
+    print(f"contacted={n_contacted:>6}  emails={n_emails:>4}  "
+          f"legacy={legacy_s * 1000:9.1f} ms  "
+          f"index build={build_s * 1000:7.1f} ms  match={match_s * 1000:8.1f} ms  "
+          f"speedup={legacy_s / max(build_s + match_s, 1e-9):6.1f}x  "
+          f"agree={agree}/{n_emails}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--contacted", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--emails", type=int, default=200)
+    args = parser.parse_args()
+
+    for n in args.contacted:
+        bench(n, args.emails)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+bench_startup.py — How long does `python main.py <mode>` spend importing
+before it does any real work? Runs each mode's imports in a fresh interpreter
+under `python -X importtime` and reports wall time plus the packages that
+account for most of the import time.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--top 8]
+
+If there's no config.py yet, example_config.py is used in its place.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What each CLI mode imports before its first network call.
+# "main" alone is what every cron invocation pays up front.
+TARGETS = {
+    "main":   "import main",
+    "scrape": "import main, scraper, sheets",
+    "email":  "import main, sheets, email_pipeline",
+    "poll":   "import main, lead_tracker",
+    "full":   "import main, scraper, sheets, email_pipeline, lead_tracker",
+}
+
+LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \| \s*(\S+)")
+
+
+def run_once(code: str, env: dict) -> tuple[float, list[tuple[str, int]]]:
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    # attribute each module's own ("self") time to its top-level package
+    by_package = {}
+    for line in proc.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            package = match.group(2).split(".")[0]
+            by_package[package] = by_package.get(package, 0) + int(match.group(1))
+    return wall, sorted(by_package.items(), key=lambda t: -t[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    tmp = None
+    if not os.path.exists(os.path.join(ROOT, "config.py")):
+        tmp = tempfile.mkdtemp()
+        shutil.copy(os.path.join(ROOT, "example_config.py"), os.path.join(tmp, "config.py"))
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [tmp, env.get("PYTHONPATH")]))
+
+    try:
+        print(f"{'mode':<8} {'wall':>8} {'imports':>9}   heaviest packages (ms of import time)")
+        for mode, code in TARGETS.items():
+            runs = [run_once(code, env) for _ in range(args.repeat)]
+            wall, packages = min(runs, key=lambda r: r[0])
+            total_us = sum(us for _, us in packages)
+            print(f"{mode:<8} {wall * 1000:5.0f} ms {total_us / 1000:6.0f} ms   "
+                  + ", ".join(f"{name} {us / 1000:.0f}" for name, us in packages[:args.top]))
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,634 @@
+"""
+standins.py — Local stand-ins for every external service the agent talks to,
+so the real pipeline code can be run and timed offline.
+
+    make_fake_ddgs        drop-in for ddgs.DDGS (synthetic search hits)
+    make_fake_dns_lookup  drop-in for resolver._lookup
+    make_fake_http        drop-in for enricher.http_session (listing pages with emails, ETags)
+    LocalSMTPServer       plaintext SMTP relay on 127.0.0.1 (AUTH PLAIN, no TLS)
+    LocalIMAPServer       IMAP4rev1 subset on 127.0.0.1 (UID SEARCH/FETCH/STORE, IDLE,
+                          BODYSTRUCTURE and partial BODY[section]<o.n> fetches)
+    InMemorySheets        object with the googleapiclient Sheets v4 call surface
+    CannedGroq            object with the groq.Groq chat.completions surface
+
+Every stand-in takes a latency (seconds) that it sleeps per request, and
+reports each call to a StageTimer so the benchmark can print per-stage
+percentiles.
+"""
+
+import email
+import json
+import re
+import select
+import socketserver
+import threading
+import time
+from email.message import EmailMessage
+from types import SimpleNamespace
+
+
+# ─────────────────────────────────────────────
+# Per-stage latency recording
+# ─────────────────────────────────────────────
+class StageTimer:
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self.samples  = {}
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def timed(self, stage: str, fn):
+        """Wrap `fn` so every call is recorded under `stage`."""
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+        return wrapper
+
+    def summary(self) -> dict:
+        out = {}
+        for stage, values in sorted(self.samples.items()):
+            values = sorted(values)
+            out[stage] = {
+                "count": len(values),
+                "p50_ms": 1000 * values[int(0.50 * (len(values) - 1))],
+                "p99_ms": 1000 * values[int(0.99 * (len(values) - 1))],
+            }
+        return out
+
+
+# ─────────────────────────────────────────────
+# Search + DNS
+# ─────────────────────────────────────────────
+def make_fake_ddgs(timer: StageTimer, latency: float, has_site_every: int = 10, no_email_every: int = 3):
+    """
+    Return a DDGS-compatible class producing deterministic synthetic hits.
+    Every `no_email_every`-th snippet has no address; its listing page does (see make_fake_http).
+    """
+
+    class FakeDDGS:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def text(self, query: str, max_results: int = 10):
+            start = time.perf_counter()
+            time.sleep(latency)
+            slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")
+            hits = []
+            for i in range(max_results):
+                name = f"{query.replace(' contact', '').title()} Studio {i}"
+                if i % has_site_every == 0:
+                    href = f"https://{slug}-{i}.has-site.test/"
+                else:
+                    href = f"https://www.facebook.com/{slug}-{i}"
+                if no_email_every and i % no_email_every == 1:
+                    body = "Family-run place. Message us on our page."
+                else:
+                    body = f"Family-run place. Call or write to hello{i}@{slug}.example.com"
+                hits.append({"title": name, "body": body, "href": href})
+            timer.record("search", time.perf_counter() - start)
+            return hits
+
+    return FakeDDGS
+
+
+def make_fake_http(timer: StageTimer, latency: float):
+    """
+    Return a requests.Session stand-in. Every page is a listing for the
+    business in its path, showing its address as a mailto: link or spelled
+    "hello3 [at] ... [dot] com". Pages carry an ETag and answer a matching
+    If-None-Match with 304.
+    """
+
+    class Response:
+        def __init__(self, status: int, body: bytes = b"", headers: dict | None = None):
+            self.status_code = status
+            self.headers     = headers or {}
+            self.encoding    = "utf-8"
+            self._body       = body
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def iter_content(self, chunk_size: int = 1):
+            for i in range(0, len(self._body), chunk_size):
+                yield self._body[i:i + chunk_size]
+
+    class Session:
+        def get(self, url: str, headers: dict | None = None, **_):
+            start = time.perf_counter()
+            time.sleep(latency)
+            etag = '"' + str(abs(hash(url))) + '"'
+            if (headers or {}).get("If-None-Match") == etag:
+                resp = Response(304)
+            else:
+                match = re.search(r"/([a-z0-9-]+)-(\d+)/?$", url)
+                slug, i = (match.group(1), int(match.group(2))) if match else ("unknown", 0)
+                if i % 2:
+                    contact = f"hello{i} [at] {slug} [dot] example [dot] com"
+                else:
+                    contact = f'<a href="mailto:hello{i}@{slug}.example.com">Email us</a>'
+                page = (f"<html><head><title>{slug}</title></head><body>"
+                        f"<p>{'Opening hours, photos and reviews. ' * 40}</p>"
+                        f"<p>{contact}</p></body></html>")
+                resp = Response(200, page.encode(), {"Content-Type": "text/html; charset=utf-8", "ETag": etag})
+            timer.record("http", time.perf_counter() - start)
+            return resp
+
+    return Session()
+
+
+def make_fake_dns_lookup(timer: StageTimer, latency: float):
+    def lookup(domain: str) -> bool:
+        start = time.perf_counter()
+        time.sleep(latency)
+        timer.record("dns", time.perf_counter() - start)
+        return domain.endswith(".has-site.test")
+    return lookup
+
+
+# ─────────────────────────────────────────────
+# Line-based TCP server base
+# ─────────────────────────────────────────────
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads      = True
+    allow_reuse_address = True
+
+
+def _serve(handler_cls, **attrs) -> _Server:
+    server = _Server(("127.0.0.1", 0), handler_cls)
+    for k, v in attrs.items():
+        setattr(server, k, v)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ─────────────────────────────────────────────
+# SMTP
+# ─────────────────────────────────────────────
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _w(self, line: str):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        srv = self.server
+        self._w("220 localhost ESMTP stand-in")
+        mail_from, rcpts = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            cmd  = line.split(" ", 1)[0].upper()
+
+            if cmd in ("EHLO", "HELO"):
+                self._w("250-localhost")
+                self._w("250-AUTH PLAIN")
+                self._w("250 8BITMIME")
+            elif cmd == "AUTH":
+                self._w("235 2.7.0 Accepted")
+            elif cmd == "MAIL":
+                mail_from, rcpts = line.split(":", 1)[1].strip(" <>"), []
+                self._w("250 OK")
+            elif cmd == "RCPT":
+                rcpts.append(line.split(":", 1)[1].strip(" <>"))
+                self._w("250 OK")
+            elif cmd == "DATA":
+                self._w("354 End data with <CR><LF>.<CR><LF>")
+                chunks = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b".\r\n", b".\n", b""):
+                        break
+                    chunks.append(data_line)
+                time.sleep(srv.latency)
+                srv.on_message(mail_from, rcpts, b"".join(chunks))
+                self._w("250 OK queued")
+            elif cmd in ("RSET", "NOOP"):
+                self._w("250 OK")
+            elif cmd == "QUIT":
+                self._w("221 Bye")
+                return
+            else:
+                self._w("502 Command not implemented")
+
+
+class LocalSMTPServer:
+    """
+    Accepts any login and any message. `on_message(from, rcpts, data)` is
+    called for each delivered message (used to script replies into IMAP).
+    """
+
+    def __init__(self, latency: float = 0.0, on_message=None):
+        self.received = 0
+        self._lock    = threading.Lock()
+        self._hook    = on_message
+        self._server  = _serve(_SMTPHandler, latency=latency, on_message=self._on_message)
+        self.port     = self._server.server_address[1]
+
+    def _on_message(self, mail_from, rcpts, data):
+        with self._lock:
+            self.received += 1
+        if self._hook:
+            self._hook(mail_from, rcpts, data)
+
+    def close(self):
+        self._server.shutdown()
+
+
+# ─────────────────────────────────────────────
+# IMAP
+# ─────────────────────────────────────────────
+class Mailbox:
+    def __init__(self):
+        self.messages = []       # dicts: uid, raw, seen (+ msg, parsed on first FETCH)
+        self.uidnext  = 1
+        self.cond     = threading.Condition()
+
+    def add(self, raw: bytes):
+        with self.cond:
+            self.messages.append({"uid": self.uidnext, "raw": raw, "seen": False})
+            self.uidnext += 1
+            self.cond.notify_all()
+
+    def add_reply(self, sender: str, subject: str, body: str, attachment: bytes = b""):
+        msg = EmailMessage()
+        msg["From"]    = sender
+        msg["To"]      = "agent@example.com"
+        msg["Subject"] = subject
+        msg.set_content(body)
+        if attachment:
+            msg.add_attachment(attachment, maintype="application", subtype="pdf", filename="brochure.pdf")
+        self.add(msg.as_bytes())
+
+
+def _literal(data: bytes) -> bytes:
+    return f"{{{len(data)}}}\r\n".encode() + data
+
+
+def _bodystructure(part) -> str:
+    if part.is_multipart():
+        children = "".join(_bodystructure(p) for p in part.get_payload())
+        return f'({children} "{part.get_content_subtype().upper()}")'
+    params  = " ".join(f'"{k.upper()}" "{v}"' for k, v in (part.get_params() or [])[1:])
+    payload = part.get_payload().encode()
+    encoding = part.get("Content-Transfer-Encoding", "7bit").upper()
+    fields  = (f'"{part.get_content_maintype().upper()}" "{part.get_content_subtype().upper()}" '
+               f'{"(" + params + ")" if params else "NIL"} NIL NIL "{encoding}" {len(payload)}')
+    if part.get_content_maintype() == "text":
+        fields += " " + str(payload.count(b"\n"))   # body lines
+    return f"({fields})"
+
+
+def _section(msg, spec: str) -> bytes:
+    """The bytes of BODY[spec]: "" (whole message), HEADER.FIELDS (...) or a part number like 1.2."""
+    if not spec:
+        return msg.as_bytes()
+    if spec.upper().startswith("HEADER.FIELDS"):
+        names = {n.upper() for n in re.search(r"\(([^)]*)\)", spec).group(1).split()}
+        return ("".join(f"{k}: {v}\r\n" for k, v in msg.items() if k.upper() in names) + "\r\n").encode()
+    part = msg
+    for n in spec.split("."):
+        if part.is_multipart():
+            part = part.get_payload()[int(n) - 1]
+    return part.get_payload().encode()
+
+
+_FETCH_ITEM_RE = re.compile(r"BODY(?:\.PEEK)?\[([^\]]*)\](?:<(\d+)\.(\d+)>)?|BODYSTRUCTURE|RFC822|UID", re.I)
+
+
+def _fetch_items(m: dict, items: str) -> bytes:
+    if "msg" not in m:
+        m["msg"] = email.message_from_bytes(m["raw"])
+    msg   = m["msg"]
+    parts = [f"UID {m['uid']}".encode()]
+    for item in _FETCH_ITEM_RE.finditer(items):
+        name = item.group(0).upper()
+        if name == "UID":
+            continue
+        if name == "RFC822":
+            parts.append(b"RFC822 " + _literal(m["raw"]))
+        elif name == "BODYSTRUCTURE":
+            parts.append(b"BODYSTRUCTURE " + _bodystructure(msg).encode())
+        else:
+            spec, origin, count = item.groups()
+            data, label = _section(msg, spec), f"BODY[{spec}]"
+            if origin is not None:
+                data   = data[int(origin):int(origin) + int(count)]
+                label += f"<{origin}>"
+            parts.append(label.encode() + b" " + _literal(data))
+    return b" ".join(parts)
+
+
+def _uid_set(spec: str, highest: int) -> set[int]:
+    uids = set()
+    for part in spec.split(","):
+        if ":" in part:
+            lo, hi = part.split(":")
+            lo = int(lo)
+            hi = highest if hi == "*" else int(hi)
+            uids.update(range(min(lo, hi), max(lo, hi) + 1))
+        else:
+            uids.add(int(part))
+    return uids
+
+
+class _IMAPHandler(socketserver.StreamRequestHandler):
+    def _w(self, data):
+        data = data if isinstance(data, bytes) else data.encode()
+        self.server.counter["bytes"] += len(data)
+        self.wfile.write(data)
+
+    def handle(self):
+        box, latency = self.server.mailbox, self.server.latency
+        self._w("* OK IMAP4rev1 stand-in ready\r\n")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            tag, _, rest = raw.decode().rstrip("\r\n").partition(" ")
+            cmd, _, arg  = rest.partition(" ")
+            cmd = cmd.upper()
+
+            if cmd == "CAPABILITY":
+                self._w("* CAPABILITY IMAP4rev1 IDLE UIDPLUS\r\n")
+            elif cmd in ("LOGIN", "NOOP"):
+                pass
+            elif cmd == "LOGOUT":
+                self._w(f"* BYE\r\n{tag} OK LOGOUT completed\r\n")
+                return
+            elif cmd == "SELECT":
+                self._w(f"* {len(box.messages)} EXISTS\r\n* OK [UIDVALIDITY 1] UIDs valid\r\n")
+                self._w(f"{tag} OK [READ-WRITE] SELECT completed\r\n")
+                continue
+            elif cmd == "IDLE":
+                self._idle(tag, box)
+                continue
+            elif cmd == "UID":
+                time.sleep(latency)
+                self._uid(arg, box)
+            else:
+                self._w(f"{tag} BAD unsupported\r\n")
+                continue
+            self._w(f"{tag} OK {cmd} completed\r\n")
+
+    def _idle(self, tag, box):
+        self._w("+ idling\r\n")
+        seen = len(box.messages)
+        while True:
+            with box.cond:
+                if len(box.messages) > seen:
+                    seen = len(box.messages)
+                    self._w(f"* {seen} EXISTS\r\n")
+            if select.select([self.connection], [], [], 0.05)[0]:
+                self.rfile.readline()   # DONE
+                break
+        self._w(f"{tag} OK IDLE terminated\r\n")
+
+    def _uid(self, arg, box):
+        sub, _, rest = arg.partition(" ")
+        sub = sub.upper()
+        highest = box.uidnext - 1
+
+        if sub == "SEARCH":
+            wanted = None
+            match = re.search(r"UID (\S+)", rest)
+            if match:
+                wanted = _uid_set(match.group(1), highest)
+            unseen_only = "UNSEEN" in rest.upper()
+            hits = [m["uid"] for m in box.messages
+                    if (wanted is None or m["uid"] in wanted) and not (unseen_only and m["seen"])]
+            self._w(f"* SEARCH {' '.join(map(str, hits))}\r\n".replace(" \r\n", "\r\n"))
+
+        elif sub == "FETCH":
+            uid_spec, _, items = rest.partition(" ")
+            wanted = _uid_set(uid_spec, highest)
+            for seq, m in enumerate(box.messages, 1):
+                if m["uid"] in wanted:
+                    if re.search(r"RFC822|BODY\[", items, re.I):   # BODY.PEEK[...] leaves \Seen alone
+                        m["seen"] = True
+                    self._w(f"* {seq} FETCH (".encode() + _fetch_items(m, items) + b")\r\n")
+
+        elif sub == "STORE":
+            uid_spec = rest.split(" ", 1)[0]
+            wanted = _uid_set(uid_spec, highest)
+            for m in box.messages:
+                if m["uid"] in wanted:
+                    m["seen"] = True
+
+
+class LocalIMAPServer:
+    def __init__(self, latency: float = 0.0):
+        self.mailbox  = Mailbox()
+        self._counter = {"bytes": 0}
+        self._server  = _serve(_IMAPHandler, mailbox=self.mailbox, latency=latency, counter=self._counter)
+        self.port     = self._server.server_address[1]
+
+    @property
+    def bytes_sent(self) -> int:
+        """Bytes written to IMAP clients so far."""
+        return self._counter["bytes"]
+
+    def close(self):
+        self._server.shutdown()
+
+
+# ─────────────────────────────────────────────
+# Google Sheets
+# ─────────────────────────────────────────────
+def _col(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+
+def _parse_range(a1: str):
+    """Split an A1 range like 'Tab'!A2:J into (tab, first_col, first_row, last_col, last_row or None)."""
+    tab, _, cells = a1.rpartition("!")
+    match = re.fullmatch(r"([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?", cells)
+    c1, r1, c2, r2 = match.groups()
+    first_row = int(r1) if r1 else 1
+    last_row  = int(r2) if r2 else (None if c2 or not r1 else first_row)
+    return tab.strip("'"), _col(c1), first_row, _col(c2 or c1), last_row
+
+
+class _Request:
+    def __init__(self, sheets, fn):
+        self._sheets = sheets
+        self._fn     = fn
+
+    def execute(self):
+        start = time.perf_counter()
+        time.sleep(self._sheets.latency)
+        with self._sheets.lock:
+            result = self._fn()
+        self._sheets.timer.record("sheets", time.perf_counter() - start)
+        return result
+
+
+class InMemorySheets:
+    """
+    Implements the subset of service.spreadsheets() / .values() the agent
+    uses: get, batchUpdate, values().get/batchGet/update/batchUpdate/append.
+    """
+
+    def __init__(self, timer: StageTimer, latency: float = 0.0):
+        self.timer   = timer
+        self.latency = latency
+        self.tabs    = {}
+        self.lock    = threading.Lock()
+        self.calls   = 0
+
+    # service.spreadsheets() returns this object; .values() returns a view with
+    # the value-level methods (which reuse the names get / batchUpdate).
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return _ValuesView(self)
+
+    def get(self, spreadsheetId, fields=None, **_):
+        self.calls += 1
+        return _Request(self, lambda: {"sheets": [{"properties": {"title": t}} for t in self.tabs]})
+
+    def batchUpdate(self, spreadsheetId, body):
+        self.calls += 1
+
+        def run():
+            for req in body.get("requests", []):
+                self.tabs.setdefault(req["addSheet"]["properties"]["title"], [])
+            return {}
+        return _Request(self, run)
+
+    # ── helpers used by _ValuesView ──
+    def read(self, a1: str) -> list[list]:
+        tab, c1, r1, c2, r2 = _parse_range(a1)
+        rows = self.tabs.get(tab, [])
+        r2   = len(rows) if r2 is None else r2
+        out  = []
+        for row in rows[r1 - 1:r2]:
+            cells = row[c1:c2 + 1]
+            while cells and cells[-1] == "":
+                cells.pop()
+            out.append(cells)
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def write(self, tab: str, first_row: int, first_col: int, values: list[list]):
+        rows = self.tabs.setdefault(tab, [])
+        for i, vals in enumerate(values):
+            while len(rows) < first_row + i:
+                rows.append([])
+            row = rows[first_row + i - 1]
+            if len(row) < first_col + len(vals):
+                row.extend([""] * (first_col + len(vals) - len(row)))
+            row[first_col:first_col + len(vals)] = [str(v) for v in vals]
+
+
+class _ValuesView:
+    def __init__(self, sheets: InMemorySheets):
+        self.s = sheets
+
+    def get(self, spreadsheetId, range):
+        self.s.calls += 1
+        return _Request(self.s, lambda: {"range": range, "values": self.s.read(range)})
+
+    def batchGet(self, spreadsheetId, ranges):
+        self.s.calls += 1
+        return _Request(self.s, lambda: {"valueRanges": [{"range": r, "values": self.s.read(r)} for r in ranges]})
+
+    def update(self, spreadsheetId, range, valueInputOption, body):
+        self.s.calls += 1
+
+        def run():
+            tab, c1, r1, _, _ = _parse_range(range)
+            self.s.write(tab, r1, c1, body["values"])
+            return {}
+        return _Request(self.s, run)
+
+    def batchUpdate(self, spreadsheetId, body):
+        self.s.calls += 1
+
+        def run():
+            for item in body["data"]:
+                tab, c1, r1, _, _ = _parse_range(item["range"])
+                self.s.write(tab, r1, c1, item["values"])
+            return {}
+        return _Request(self.s, run)
+
+    def append(self, spreadsheetId, range, valueInputOption, body):
+        self.s.calls += 1
+
+        def run():
+            tab   = _parse_range(range)[0]
+            rows  = self.s.tabs.setdefault(tab, [])
+            while rows and not any(rows[-1]):
+                rows.pop()
+            start = len(rows) + 1
+            self.s.write(tab, start, 0, body["values"])
+            end = start + len(body["values"]) - 1
+            return {"updates": {"updatedRange": f"'{tab}'!A{start}:J{end}"}}
+        return _Request(self.s, run)
+
+
+# ─────────────────────────────────────────────
+# Groq
+# ─────────────────────────────────────────────
+class CannedGroq:
+    """
+    Answers generation prompts with a fixed email, single-reply classification
+    with a label derived from the reply text, and batch classification with a
+    JSON object for every <reply id=...> in the prompt.
+    """
+
+    def __init__(self, timer: StageTimer, latency: float = 0.0):
+        self.timer = timer
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @staticmethod
+    def _label(text: str) -> str:
+        text = text.lower()
+        if "not interested" in text or "no thanks" in text:
+            return "not_interested"
+        if "interested" in text:
+            return "interested"
+        return "needs_followup"
+
+    def create(self, model, messages, max_tokens=None, temperature=None, **_):
+        start  = time.perf_counter()
+        time.sleep(self.latency)
+        prompt = "\n".join(m["content"] for m in messages)
+
+        ids = re.findall(r'<reply id="([^"]+)"[^>]*>\n(.*?)\n</reply>', prompt, re.DOTALL)
+        if ids:
+            content = json.dumps({rid: self._label(text) for rid, text in ids})
+        elif "Classify" in prompt:
+            content = self._label(prompt.split("---")[1] if "---" in prompt else prompt)
+        else:
+            content = ("Quick question about your website\n---BODY---\n"
+                       "Hi there,\n\nWe build websites for brands. Reply to this email if you're "
+                       "interested in connecting further.\n\nKunal, Devark Studios")
+
+        prompt_tokens     = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        self.timer.record("llm", time.perf_counter() - start)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens,
+                                  completion_tokens=completion_tokens,
+                                  total_tokens=prompt_tokens + completion_tokens),
+        )
+
@@ -0,0 +1,109 @@
+"""
+combo_scheduler.py — Decides which (niche, city) combos each scrape cycle
+searches. Walks NICHES × CITIES in rounds so no combo repeats until every
+other one has had its turn, tries never-searched combos first, then prefers
+combos that recently turned up new businesses. A combo that found nothing
+new sits out the next 1, 3, 7, ... rounds (capped at
+COMBO_MAX_COOLDOWN_ROUNDS). State is kept on disk between runs.
+"""
+
+import json
+import random
+import threading
+import time
+
+from config import NICHES, CITIES, COMBO_MAX_COOLDOWN_ROUNDS
+from disk_cache import cache_path, write_json_atomic
+
+
+SCHEDULE_FILE = "combo_schedule.json"
+YIELD_WEIGHT  = 0.5   # weight of the latest run in the moving-average yield
+
+
+def _key(niche: str, city: str) -> str:
+    return f"{niche}\t{city}"
+
+
+class ComboScheduler:
+    def __init__(self, niches=NICHES, cities=CITIES, filename: str = SCHEDULE_FILE,
+                 max_cooldown: int = COMBO_MAX_COOLDOWN_ROUNDS):
+        self.combos       = list(dict.fromkeys((n, c) for n in niches for c in cities))
+        self.max_cooldown = max_cooldown
+        self.path         = cache_path(filename)
+        self.round        = 0
+        self.stats        = {}   # key -> {"round", "skip_until", "zeros", "yield", "runs", "last_run"}
+        self._lock        = threading.Lock()
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+            self.round = state["round"]
+            self.stats = state["combos"]
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        write_json_atomic(self.path, {"round": self.round, "combos": self.stats})
+
+    def _eligible(self, exclude: set) -> list[tuple[str, str]]:
+        ready = []
+        for combo in self.combos:
+            st = self.stats.get(_key(*combo), {})
+            if combo in exclude or st.get("round", -1) >= self.round:
+                continue   # already searched this round
+            if st.get("skip_until", -1) >= self.round:
+                continue   # cooling down after a run with nothing new
+            ready.append(combo)
+
+        def priority(combo):
+            st = self.stats.get(_key(*combo))
+            if not st or not st["runs"]:
+                return float("-inf")   # never searched — try it first
+            return -st["yield"]
+
+        random.shuffle(ready)   # random order among equals
+        ready.sort(key=priority)
+        return ready
+
+    def pick(self, n: int) -> list[tuple[str, str]]:
+        """Choose up to `n` distinct combos for the next cycle and mark them as searched this round."""
+        with self._lock:
+            picked = []
+            for _ in range(self.max_cooldown + 2):
+                picked += self._eligible(set(picked))[:n - len(picked)]
+                if len(picked) >= n or len(picked) == len(self.combos):
+                    break
+                self.round += 1   # this round is used up — start the next one
+
+            for combo in picked:
+                st = self.stats.setdefault(_key(*combo), {"zeros": 0, "yield": 0.0, "runs": 0})
+                st["round"] = self.round
+            self._save()
+            return picked
+
+    def record(self, combo: tuple[str, str], new_businesses: int):
+        """Feed back how many businesses a finished combo added that weren't already known."""
+        with self._lock:
+            st = self.stats.setdefault(_key(*combo), {"round": self.round, "zeros": 0, "yield": 0.0, "runs": 0})
+            st["yield"]    = new_businesses if not st["runs"] else \
+                             YIELD_WEIGHT * new_businesses + (1 - YIELD_WEIGHT) * st["yield"]
+            st["runs"]    += 1
+            st["last_run"] = time.time()
+            if new_businesses:
+                st["zeros"]      = 0
+                st["skip_until"] = -1
+            else:
+                st["zeros"]     += 1
+                st["skip_until"] = st["round"] + min(2 ** st["zeros"] - 1, self.max_cooldown)
+            self._save()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> ComboScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ComboScheduler()
+        return _scheduler
@@ -0,0 +1,128 @@
+"""
+daemon.py — Runs the scrape, email and poll stages continuously in one
+process. An asyncio loop schedules each stage on its own interval. The
+stages themselves are blocking code, so each run happens on a worker thread
+and a slow scrape doesn't hold up polling. Every stage shares the
+process-wide clients (Sheets service, SMTP and IMAP sessions, Groq client),
+so auth and connection setup are paid once.
+
+Ctrl+C / SIGTERM stops scheduling new runs, gives in-flight runs
+DAEMON_SHUTDOWN_GRACE_SECONDS to finish, then closes the shared sessions.
+"""
+
+import asyncio
+import signal
+import sys
+import threading
+import time
+
+from config import DAEMON_SHUTDOWN_GRACE_SECONDS
+import metrics
+
+
+def _in_thread(name: str, fn) -> asyncio.Future:
+    """
+    Run `fn` on a daemon thread and return a future for its result. Unlike
+    asyncio.to_thread, a run stuck past the shutdown grace period can't keep
+    the interpreter from exiting.
+    """
+    loop   = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(setter, value):
+        if not future.done():
+            setter(value)
+
+    def run():
+        try:
+            result = fn()
+        except BaseException as e:
+            setter, value = future.set_exception, e
+        else:
+            setter, value = future.set_result, result
+        try:
+            loop.call_soon_threadsafe(settle, setter, value)
+        except RuntimeError:
+            pass   # the loop already shut down without us
+
+    threading.Thread(target=run, name=f"stage-{name}", daemon=True).start()
+    return future
+
+
+class Daemon:
+    def __init__(self, stages: dict, grace: float = DAEMON_SHUTDOWN_GRACE_SECONDS):
+        """`stages` maps a name to (callable, interval_seconds)."""
+        self.stages   = stages
+        self.grace    = grace
+        self.running  = {}     # stage name -> future of its in-flight run
+        self._stop    = None   # asyncio.Event, created inside the loop
+
+    async def _stage_loop(self, name: str, fn, interval: float):
+        while not self._stop.is_set():
+            start = time.monotonic()
+            print(f"[DAEMON] Stage '{name}' started.")
+            self.running[name] = _in_thread(name, fn)
+            try:
+                await asyncio.shield(self.running[name])
+                print(f"[DAEMON] Stage '{name}' finished in {time.monotonic() - start:.1f}s.")
+            except Exception as e:
+                print(f"[DAEMON] Stage '{name}' failed: {e}")
+            finally:
+                self.running.pop(name, None)
+            metrics.write_prometheus()
+
+            # the next run starts `interval` after this one ended
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _request_stop(self):
+        if not self._stop.is_set():
+            print("\n[DAEMON] Shutting down — no new stage runs will start...")
+            self._stop.set()
+
+    async def _run(self):
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._request_stop)
+            except (NotImplementedError, RuntimeError):
+                pass   # e.g. Windows; Ctrl+C still arrives as KeyboardInterrupt
+
+        tasks = [asyncio.create_task(self._stage_loop(name, fn, interval), name=name)
+                 for name, (fn, interval) in self.stages.items()]
+        await self._stop.wait()
+
+        # stage loops are parked in wait_for or in the shielded run: cancel
+        # the loops, then give any in-flight runs the grace period
+        in_flight = dict(self.running)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if in_flight:
+            print(f"[DAEMON] Waiting up to {self.grace:.0f}s for: {', '.join(in_flight)}")
+            done, pending = await asyncio.wait(in_flight.values(), timeout=self.grace)
+            for name, future in in_flight.items():
+                if future in pending:
+                    print(f"[DAEMON] Stage '{name}' didn't finish in time; abandoning it.")
+
+    def run(self):
+        for name, (_, interval) in self.stages.items():
+            print(f"[DAEMON] {name:<7} every {interval}s")
+        try:
+            asyncio.run(self._run())
+        except KeyboardInterrupt:
+            print("\n[DAEMON] Interrupted.")
+        finally:
+            _close_shared_clients()
+        print("[DAEMON] Stopped.")
+
+
+def _close_shared_clients():
+    # only close what this process actually opened
+    if "email_sender" in sys.modules:
+        sys.modules["email_sender"].close_sessions()
+    if "lead_tracker" in sys.modules:
+        sys.modules["lead_tracker"].close_imap_sessions()
@@ -0,0 +1,93 @@
+"""
+disk_cache.py — Tiny JSON-file key/value cache with per-entry TTLs, plus the
+atomic JSON write every piece of local state uses.
+Used for things that are cheap to store but slow to recompute between runs
+(DNS answers, search results, ...).
+"""
+
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from config import CACHE_DIR
+
+
+MISSING = object()
+
+
+def cache_path(filename: str) -> str:
+    """Return a path inside CACHE_DIR, creating the directory if needed."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
+
+
+def write_json_atomic(path: str, data, lock=None):
+    """
+    Write `data` to `path` as JSON; readers only ever see the old or the new
+    file. The temp file has a unique name, so concurrent writers can't clobber
+    each other's; pass `lock` to also serialise them.
+    """
+    with lock or contextlib.nullcontext():
+        fd, tmp = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp",
+                                   dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+
+
+class TTLCache:
+    """
+    Dict-like cache persisted as {key: [value, expires_at]} in a JSON file.
+    Expired entries are treated as missing and dropped on save().
+    """
+
+    def __init__(self, filename: str, default_ttl: float):
+        self.path        = cache_path(filename)
+        self.default_ttl = default_ttl
+        self._lock       = threading.Lock()
+        self._dirty      = False
+        self._data       = {}
+        try:
+            with open(self.path, "r") as f:
+                self._data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def get(self, key: str, default=MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._data[key]
+                self._dirty = True
+                return default
+            return value
+
+    def set(self, key: str, value, ttl: float | None = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = [value, time.time() + ttl]
+            self._dirty = True
+
+    def __len__(self):
+        return len(self._data)
+
+    def save(self):
+        """Write the cache to disk (atomically) if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            self._data = {k: v for k, v in self._data.items() if v[1] >= now}
+            write_json_atomic(self.path, self._data)
+            self._dirty = False
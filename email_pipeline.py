@@ -0,0 +1,261 @@
+"""
+email_pipeline.py — Staged, concurrent version of the "email pending" run.
+
+    feeder ──▶ generate (EMAIL_GEN_WORKERS threads) ──▶ send (1 thread per account) ──▶ write
+               └ Groq limiter in ai.py                 └ SenderPool quotas            └ SheetWriter
+
+Stages are connected by bounded queues, so AI generation, SMTP sends and sheet
+writes overlap instead of adding up. The write stage runs on the calling
+thread because the Sheets service object is not thread-safe.
+
+The feeder only queues as many businesses as the sender accounts have daily
+quota left for. Anything past that stays Pending for the next run.
+
+Every generation, send and sheet write is recorded in the send journal
+(send_journal.py). A run first finishes the sheet writes an interrupted run
+left behind, and never re-generates or re-sends a row the journal knows about.
+
+If a stage hits an unexpected error (e.g. the journal can't be written), the
+run stops: no new emails are generated or sent, the rows still queued stay
+Pending, and every stage still passes its end marker on so the run finishes.
+"""
+
+import queue
+import threading
+
+from ai import generate_cold_email
+from email_sender import extract_email_from_snippet, get_sender_pool, SenderPool, QuotaExhausted
+from send_journal import SendJournal, get_journal
+from sheets import SheetWriter
+from config import EMAIL_GEN_WORKERS, EMAIL_QUEUE_SIZE
+
+
+_DONE = object()   # end-of-stream marker passed down the queues
+
+
+def _stage_failed(stage: str, biz: dict, e: Exception, abort: threading.Event):
+    print(f"  [ERROR] {stage} stage failed on '{biz['business_name']}': {e}. Stopping the email run.")
+    abort.set()
+
+
+def _feed(pending: list[dict], gen_q: queue.Queue, write_q: queue.Queue, workers: int, budget: float):
+    try:
+        queued = 0
+        for biz in pending:
+            # found on the business's pages at scrape time, or else in the snippet
+            email_addr = biz.get("email_address") or \
+                         extract_email_from_snippet(biz.get("snippet", ""), biz.get("source_url", ""))
+            if not email_addr:
+                write_q.put(("no_email", biz, None, None))
+            elif queued >= budget:
+                write_q.put(("quota", biz, email_addr, None))
+            else:
+                gen_q.put((biz, email_addr))
+                queued += 1
+    finally:
+        for _ in range(workers):
+            gen_q.put(_DONE)
+
+
+def _generate(gen_q: queue.Queue, send_q: queue.Queue, write_q: queue.Queue, journal: SendJournal,
+              abort: threading.Event):
+    while True:
+        item = gen_q.get()
+        if item is _DONE:
+            return
+        biz, email_addr = item
+        if abort.is_set():
+            write_q.put(("aborted", biz, email_addr, None))
+            continue
+        try:
+            content = _generate_one(biz, journal)
+        except Exception as e:
+            _stage_failed("Generate", biz, e, abort)
+            write_q.put(("aborted", biz, email_addr, None))
+            continue
+        if content is None:
+            write_q.put(("gen_failed", biz, email_addr, None))
+        else:
+            send_q.put((biz, email_addr, content))
+
+
+def _generate_one(biz: dict, journal: SendJournal) -> dict | None:
+    print(f"\n[MAIN] Processing: {biz['business_name']} ({biz['niche']}, {biz['city']})")
+    content = journal.content(biz["row_index"])   # generated by an earlier run that didn't send it
+    if content is None:
+        try:
+            content = generate_cold_email(
+                business_name=biz["business_name"],
+                niche=biz["niche"],
+                city=biz["city"],
+                snippet=biz.get("snippet", ""),
+            )
+        except Exception as e:
+            print(f"  [SKIP] Email generation failed for '{biz['business_name']}': {e}")
+            return None
+        journal.record("generated", biz["row_index"], subject=content["subject"], body=content["body"])
+    return content
+
+
+def _close_send(gen_threads: list[threading.Thread], send_q: queue.Queue, senders: int):
+    """Once every generator is done, tell each sender to stop."""
+    for t in gen_threads:
+        t.join()
+    for _ in range(senders):
+        send_q.put(_DONE)
+
+
+def _send(send_q: queue.Queue, write_q: queue.Queue, pool: SenderPool, journal: SendJournal,
+          abort: threading.Event):
+    try:
+        while True:
+            item = send_q.get()
+            if item is _DONE:
+                return
+            biz, email_addr, content = item
+            if abort.is_set():
+                write_q.put(("aborted", biz, email_addr, content))
+                continue
+            try:
+                write_q.put(_send_one(biz, email_addr, content, pool, journal))
+            except Exception as e:
+                # a row left at "sending" is settled by the next run's resume()
+                _stage_failed("Send", biz, e, abort)
+                write_q.put(("aborted", biz, email_addr, content))
+    finally:
+        write_q.put(_DONE)   # the writer counts these; it must get one per sender no matter what
+
+
+def _send_one(biz: dict, email_addr: str, content: dict, pool: SenderPool, journal: SendJournal) -> tuple:
+    row = biz["row_index"]
+    # on disk before SMTP sees it: after a crash this row is never sent again
+    journal.record("sending", row, sync=True, to=email_addr)
+    try:
+        sender = pool.send(email_addr, content["subject"], content["body"])
+    except QuotaExhausted:
+        journal.record("unsent", row)
+        return ("quota", biz, email_addr, content)
+    if sender:
+        journal.record("sent", row, sync=True, sender=sender)
+        content = {**content, "sender": sender}
+    else:
+        journal.record("failed", row)
+    return ("sent" if sender else "send_failed", biz, email_addr, content)
+
+
+def _sheet_update(outcome: str, email_addr: str, subject: str = "", sender: str | None = None) -> dict:
+    """update_row() arguments for a row that went through (or into) SMTP."""
+    if outcome == "sent":
+        return dict(status="Contacted", email_sent="Yes", email_address=email_addr,
+                    notes=f"Email sent. Subject: {subject}", sender=sender)
+    if outcome == "in_doubt":
+        return dict(status="Email Failed", email_sent="No", email_address=email_addr,
+                    notes="Run stopped mid-send; check the Sent folder before retrying.")
+    return dict(status="Email Failed", email_sent="No", email_address=email_addr,
+                notes="SMTP send failed. Check logs.")
+
+
+_RESUMED_OUTCOME = {"sent": "sent", "failed": "send_failed", "sending": "in_doubt"}
+
+
+def resume(service, journal: SendJournal) -> set[int]:
+    """Write the sheet updates an interrupted run left outstanding. Returns the rows involved."""
+    outstanding = journal.outstanding()
+    if not outstanding:
+        return set()
+    print(f"[MAIN] Finishing {len(outstanding)} row(s) left over from an interrupted run...")
+
+    def written():
+        for row in outstanding:
+            journal.record("written", row)
+
+    with SheetWriter(service, max_rows=float("inf"), on_flush=written) as writer:
+        for row, st in outstanding.items():
+            subject = (st.get("content") or {}).get("subject", "")
+            writer.update_row(row, **_sheet_update(_RESUMED_OUTCOME[st["stage"]], st.get("to", ""),
+                                                   subject, st.get("sender")))
+    return set(outstanding)
+
+
+def run_email_pipeline(service, pending: list[dict], workers: int = EMAIL_GEN_WORKERS,
+                       pool: SenderPool | None = None, journal: SendJournal | None = None) -> tuple[int, int]:
+    """Email every pending business (up to today's sending quota). Returns (emailed, skipped)."""
+    journal = journal or get_journal()
+    if not journal.acquire():
+        print("[MAIN] Another process is sending emails right now. Skipping this run.")
+        return 0, 0
+    try:
+        resumed = resume(service, journal)
+        # rows the journal says were (or may have been) sent are never queued again
+        pending = [biz for biz in pending
+                   if biz["row_index"] not in resumed and not journal.claimed(biz["row_index"])]
+        return _run(service, pending, workers, pool or get_sender_pool(), journal)
+    finally:
+        journal.compact(keep_rows={biz["row_index"] for biz in pending})
+        journal.release()
+
+
+def _run(service, pending: list[dict], workers: int, pool: SenderPool, journal: SendJournal) -> tuple[int, int]:
+    workers = max(1, workers)
+    senders = len(pool.accounts)
+    budget  = pool.remaining_today()
+    gen_q   = queue.Queue(maxsize=EMAIL_QUEUE_SIZE)
+    send_q  = queue.Queue(maxsize=EMAIL_QUEUE_SIZE)
+    write_q = queue.Queue()   # unbounded so upstream stages never block on the writer
+
+    if budget < len(pending):
+        print(f"[MAIN] Sender accounts have quota for {budget:.0f} more email(s) today.")
+
+    abort   = threading.Event()   # set by a stage that hit an unexpected error
+
+    gen_threads = [threading.Thread(target=_generate, args=(gen_q, send_q, write_q, journal, abort),
+                                    name=f"email-gen-{i}", daemon=True) for i in range(workers)]
+    threads = gen_threads + [   # generators first: email-close joins them
+        threading.Thread(target=_feed, args=(pending, gen_q, write_q, workers, budget),
+                         name="email-feed", daemon=True),
+        threading.Thread(target=_close_send, args=(gen_threads, send_q, senders),
+                         name="email-close", daemon=True)]
+    threads += [threading.Thread(target=_send, args=(send_q, write_q, pool, journal, abort),
+                                 name=f"email-send-{i}", daemon=True) for i in range(senders)]
+    for t in threads:
+        t.start()
+
+    emailed   = 0
+    skipped   = 0
+    running   = senders
+    unflushed = []   # journaled rows whose sheet update is still buffered
+
+    def written():
+        for row in unflushed:
+            journal.record("written", row)
+        unflushed.clear()
+
+    # Row updates are buffered and flushed in batches (and on Ctrl+C / crash)
+    with SheetWriter(service, on_flush=written) as writer:
+        while running:
+            item = write_q.get()
+            if item is _DONE:
+                running -= 1
+                continue
+            outcome, biz, email_addr, content = item
+
+            if outcome == "no_email":
+                print(f"  [SKIP] No email address found for '{biz['business_name']}'. Skipping.")
+                writer.update_row(biz["row_index"],
+                                  status="No Email Found", email_sent="No",
+                                  notes="Could not extract email from snippet or URL.")
+                skipped += 1
+            elif outcome in ("gen_failed", "quota", "aborted"):
+                skipped += 1   # row stays Pending so the next run retries it
+            else:
+                unflushed.append(biz["row_index"])
+                writer.update_row(biz["row_index"], **_sheet_update(outcome, email_addr, content["subject"],
+                                                                    content.get("sender")))
+                if outcome == "sent":
+                    emailed += 1
+                else:
+                    skipped += 1
+
+    if abort.is_set():
+        print("[MAIN] Email run stopped early after an error; unsent businesses stay Pending.")
+    return emailed, skipped
@@ -1,13 +1,25 @@
 """
 email_sender.py — Sends cold emails via Gmail SMTP.
 Uses your Gmail + App Password (no OAuth needed for sending).
+One authenticated SMTP session is kept open and reused across sends.
+Cold emails can be spread over several accounts (SENDER_ACCOUNTS), each with
+its own daily and per-minute quota — see SenderPool.
 """
 
+import atexit
+import datetime
+import json
 import smtplib
 import re
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from config import GMAIL_ADDRESS, GMAIL_APP_PASSWORD
+from config import (GMAIL_ADDRESS, GMAIL_APP_PASSWORD, SMTP_IDLE_TIMEOUT_SECONDS,
+                    SENDER_ACCOUNTS, SENDER_DAILY_LIMIT, EMAIL_SEND_RATE_PER_MINUTE)
+from disk_cache import cache_path, write_json_atomic
+from ratelimit import TokenBucket
+import metrics
 
 
 SMTP_SERVER = "smtp.gmail.com"
@@ -27,30 +39,289 @@ def extract_email_from_snippet(snippet: str, source_url: str) -> str | None:
     return None
 
 
-def send_email(to_address: str, subject: str, body: str) -> bool:
-    """
-    Send a plain-text email via Gmail SMTP.
-    Returns True on success, False on failure.
-    """
+def build_message(to_address: str, subject: str, body: str, from_address: str = GMAIL_ADDRESS) -> MIMEMultipart:
     msg = MIMEMultipart()
-    msg["From"]    = GMAIL_ADDRESS
+    msg["From"]    = from_address
     msg["To"]      = to_address
     msg["Subject"] = subject
 
     # Plain text body
     msg.attach(MIMEText(body, "plain"))
+    return msg
 
-    try:
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.ehlo()
-            server.starttls()
+
+# ─────────────────────────────────────────────
+# Reusable SMTP session
+# ─────────────────────────────────────────────
+class SMTPSession:
+    """
+    Keeps one authenticated SMTP connection open across sends, so we pay for
+    EHLO/STARTTLS/LOGIN once instead of per email. The connection is reopened
+    when it has been idle longer than `idle_timeout` or when the server drops
+    it (disconnect or a 421 "service closing" reply).
+    """
+
+    def __init__(self, address: str = GMAIL_ADDRESS, password: str = GMAIL_APP_PASSWORD,
+                 host: str = SMTP_SERVER, port: int = SMTP_PORT,
+                 idle_timeout: float = SMTP_IDLE_TIMEOUT_SECONDS, starttls: bool = True):
+        self.address      = address
+        self.password     = password
+        self.host         = host
+        self.port         = port
+        self.idle_timeout = idle_timeout
+        self.starttls     = starttls   # False only for local test relays
+        self._server      = None
+        self._last_used   = 0.0
+        self._lock        = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _connect(self) -> smtplib.SMTP:
+        with metrics.timed("smtp", "connect"):
+            server = smtplib.SMTP(self.host, self.port, timeout=30)
             server.ehlo()
-            server.login(GMAIL_ADDRESS, GMAIL_APP_PASSWORD)
-            server.sendmail(GMAIL_ADDRESS, to_address, msg.as_string())
+            if self.starttls:
+                server.starttls()
+                server.ehlo()
+            server.login(self.address, self.password)
+        print(f"[EMAIL] SMTP session opened for {self.address}")
+        return server
+
+    def _get_server(self) -> smtplib.SMTP:
+        if self._server and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()  # the server has probably timed us out already
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def close(self):
+        with self._lock:
+            if self._server is None:
+                return
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def send(self, to_address: str, msg) -> None:
+        """Send one message, reconnecting once if the connection went stale. Raises on failure."""
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    server = self._get_server()
+                    with metrics.timed("smtp", "send"):
+                        server.sendmail(self.address, to_address, msg.as_string())
+                    self._last_used = time.monotonic()
+                    return
+                except smtplib.SMTPResponseException as e:
+                    if e.smtp_code != 421 or attempt == 2:
+                        raise
+                    print("[EMAIL] Server closed the session (421). Reconnecting...")
+                    self.close()
+                except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError):
+                    self._server = None
+                    if attempt == 2:
+                        raise
+                    print("[EMAIL] SMTP connection dropped. Reconnecting...")
+
+    def send_many(self, messages: list[dict]) -> list[bool]:
+        """
+        Send a batch of {"to_address", "subject", "body"} dicts over this session.
+        Returns one success flag per message, in order.
+        """
+        results = []
+        for m in messages:
+            results.append(self.send_text(m["to_address"], m["subject"], m["body"]))
+        return results
+
+    def send_text(self, to_address: str, subject: str, body: str) -> bool:
+        msg = build_message(to_address, subject, body, self.address)
+        try:
+            self.send(to_address, msg)
+            print(f"[EMAIL] ✅ Sent to {to_address} — Subject: '{subject}'")
+            return True
+        except Exception as e:
+            print(f"[EMAIL] ❌ Failed to send to {to_address}: {e}")
+            return False
+
+
+_default_session = None
+_default_lock    = threading.Lock()
+
+
+def get_session() -> SMTPSession:
+    """The process-wide session used by send_email / send_many."""
+    global _default_session
+    with _default_lock:
+        if _default_session is None:
+            _default_session = SMTPSession()
+            atexit.register(_default_session.close)
+        return _default_session
+
+
+def send_email(to_address: str, subject: str, body: str) -> bool:
+    """
+    Send a plain-text email via Gmail SMTP.
+    Returns True on success, False on failure.
+    """
+    return get_session().send_text(to_address, subject, body)
+
 
-        print(f"[EMAIL] ✅ Sent to {to_address} — Subject: '{subject}'")
-        return True
+def send_many(messages: list[dict]) -> list[bool]:
+    """Send a batch of {"to_address", "subject", "body"} dicts over one SMTP session."""
+    return get_session().send_many(messages)
 
-    except Exception as e:
-        print(f"[EMAIL] ❌ Failed to send to {to_address}: {e}")
-        return False
\ No newline at end of file
+
+# ─────────────────────────────────────────────
+# Multi-account sending
+# ─────────────────────────────────────────────
+QUOTA_FILE        = "send_quota.json"
+RESERVE_POLL_SECS = 0.25   # how often a sender re-checks when every account is rate-limited
+
+
+class QuotaExhausted(Exception):
+    """Every sender account has used up its daily quota."""
+
+
+def sender_accounts() -> list[dict]:
+    """SENDER_ACCOUNTS with defaults filled in; just GMAIL_ADDRESS when it's empty."""
+    accounts = SENDER_ACCOUNTS or [{"address": GMAIL_ADDRESS, "app_password": GMAIL_APP_PASSWORD}]
+    return [{
+        "address":      a["address"],
+        "app_password": a.get("app_password", GMAIL_APP_PASSWORD),
+        "daily_limit":  a.get("daily_limit", SENDER_DAILY_LIMIT),
+        "per_minute":   a.get("per_minute", EMAIL_SEND_RATE_PER_MINUTE),
+    } for a in accounts]
+
+
+def sender_password(address: str) -> str:
+    for a in sender_accounts():
+        if a["address"].lower() == address.lower():
+            return a["app_password"]
+    return GMAIL_APP_PASSWORD
+
+
+class SenderAccount:
+    def __init__(self, address: str, password: str, daily_limit: int, per_minute: float,
+                 session: SMTPSession | None = None):
+        self.address     = address
+        self.daily_limit = daily_limit   # 0 = no daily cap
+        self.limiter     = TokenBucket(per_minute / 60, 1)
+        self.session     = session or SMTPSession(address=address, password=password)
+        self.day         = ""
+        self.sent        = 0
+
+    def remaining(self, today: str) -> float:
+        if self.day != today:
+            self.day, self.sent = today, 0
+        if self.daily_limit <= 0:
+            return float("inf")
+        return self.daily_limit - self.sent
+
+
+class SenderPool:
+    """
+    Shards outgoing cold email across sender accounts. Each message goes out
+    from the account with the most daily quota left that also has a token in
+    its per-minute bucket. Daily counts survive restarts (.cache/send_quota.json)
+    and reset at local midnight. A send counts against the quota even if
+    it fails, since Gmail counts attempts too.
+    """
+
+    def __init__(self, accounts: list[SenderAccount]):
+        self.accounts = accounts
+        self._lock    = threading.Lock()
+        self._path    = cache_path(QUOTA_FILE)
+        try:
+            with open(self._path, "r") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            state = {}
+        for a in accounts:
+            saved = state.get(a.address, {})
+            a.day, a.sent = saved.get("day", ""), saved.get("sent", 0)
+
+    def _save(self):
+        write_json_atomic(self._path, {a.address: {"day": a.day, "sent": a.sent} for a in self.accounts})
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.date.today().isoformat()
+
+    def remaining_today(self) -> float:
+        with self._lock:
+            today = self._today()
+            return sum(max(0, a.remaining(today)) for a in self.accounts)
+
+    def _reserve(self) -> SenderAccount | None:
+        """Claim one send on some account, waiting out per-minute limits. None if all are out for today."""
+        while True:
+            with self._lock:
+                today = self._today()
+                ready = [a for a in self.accounts if a.remaining(today) > 0]
+                if not ready:
+                    return None
+                ready.sort(key=lambda a: -a.remaining(today))
+                for a in ready:
+                    if a.limiter.try_acquire():
+                        a.sent += 1
+                        self._save()
+                        return a
+            time.sleep(RESERVE_POLL_SECS)
+
+    def send(self, to_address: str, subject: str, body: str) -> str | None:
+        """
+        Send one email from whichever account is free. Returns the sending
+        address, or None if the send failed. Raises QuotaExhausted when no
+        account has any quota left today.
+        """
+        account = self._reserve()
+        if account is None:
+            raise QuotaExhausted("All sender accounts have reached their daily limit.")
+        if account.session.send_text(to_address, subject, body):
+            return account.address
+        return None
+
+    def close(self):
+        for a in self.accounts:
+            a.session.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def close_sessions():
+    """Close the default session and every pooled sender session opened so far."""
+    get_session().close()
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+
+
+def get_sender_pool() -> SenderPool:
+    """
+    The process-wide pool. GMAIL_ADDRESS, if it's a sender, reuses the default
+    session; the other accounts log in to the same server.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            base     = get_session()
+            accounts = []
+            for a in sender_accounts():
+                if a["address"].lower() == base.address.lower():
+                    session = base
+                else:
+                    session = SMTPSession(address=a["address"], password=a["app_password"],
+                                          host=base.host, port=base.port, starttls=base.starttls)
+                accounts.append(SenderAccount(a["address"], a["app_password"],
+                                              a["daily_limit"], a["per_minute"], session))
+            _pool = SenderPool(accounts)
+            atexit.register(_pool.close)
+        return _pool
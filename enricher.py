@@ -0,0 +1,173 @@
+"""
+enricher.py — Finds email addresses for scraped businesses whose search
+snippet doesn't show one, before they go into the sheet as Pending.
+
+Each business's source page (in practice a directory or social profile,
+since businesses whose own domain resolves never reach this point) is
+fetched and scanned:
+
+- all fetches share one pooled requests.Session, ENRICH_MAX_WORKERS at a time;
+- bodies are streamed and reading stops at ENRICH_MAX_PAGE_BYTES;
+- no host gets more than ENRICH_HOST_RATE_PER_SECOND requests;
+- ETag / Last-Modified are kept on disk with what the page contained, so an
+  unchanged page costs a 304 and no parsing;
+- mailto: links, plain and HTML-entity-encoded addresses and
+  "name [at] domain [dot] com" spellings are all recognised.
+"""
+
+import html
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit, unquote
+
+from config import (ENRICH_MAX_WORKERS, ENRICH_MAX_PAGE_BYTES, ENRICH_TIMEOUT_SECONDS,
+                    ENRICH_HOST_RATE_PER_SECOND, ENRICH_CACHE_TTL_SECONDS)
+from disk_cache import TTLCache
+from ratelimit import TokenBucket
+from result_filter import ResultFilter
+import metrics
+
+
+USER_AGENT    = "Mozilla/5.0 (compatible; ClientFinderBot/1.0)"
+CHUNK_BYTES   = 16 * 1024
+
+# The lookbehinds make a match start only where a run of local-part
+# characters starts; without them a long run with no "@" (minified JS, base64
+# images) is rescanned from every position, which is quadratic.
+_LOCAL        = r"(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]+"
+EMAIL_RE      = re.compile(_LOCAL + r"@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+MAILTO_RE     = re.compile(r"mailto:([^\"'?>\s]+)", re.IGNORECASE)
+_AT           = r"\s*[\[\(\{]\s*at\s*[\]\)\}]\s*"
+_DOT          = r"(?:\s*[\[\(\{]\s*dot\s*[\]\)\}]\s*|\.)"
+OBFUSCATED_RE = re.compile(rf"({_LOCAL}){_AT}([a-z0-9-]+(?:{_DOT}[a-z0-9-]+)+)", re.IGNORECASE)
+DOT_RE        = re.compile(_DOT, re.IGNORECASE)
+NOT_A_TLD     = {"png", "jpg", "jpeg", "gif", "svg", "webp", "css", "js"}   # "logo@2x.png" etc.
+
+_executor     = ThreadPoolExecutor(max_workers=ENRICH_MAX_WORKERS, thread_name_prefix="enrich")
+_pages        = TTLCache("page_cache.json", ENRICH_CACHE_TTL_SECONDS)
+_filter       = ResultFilter()
+_host_limits  = {}
+_host_lock    = threading.Lock()
+_session      = None
+_session_lock = threading.Lock()
+
+
+def http_session():
+    """The process-wide pooled requests.Session, created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=ENRICH_MAX_WORKERS, pool_maxsize=ENRICH_MAX_WORKERS)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            _session.headers["User-Agent"] = USER_AGENT
+        return _session
+
+
+def _host_limiter(host: str) -> TokenBucket:
+    with _host_lock:
+        if host not in _host_limits:
+            _host_limits[host] = TokenBucket(ENRICH_HOST_RATE_PER_SECOND, 1)
+        return _host_limits[host]
+
+
+# ─────────────────────────────────────────────
+# Parsing
+# ─────────────────────────────────────────────
+def extract_emails(page: str) -> list[str]:
+    """Every distinct address on the page, in order of appearance (mailto: links first)."""
+    text  = html.unescape(page)   # &#64; / &commat; → @
+    found = MAILTO_RE.findall(text) + EMAIL_RE.findall(text)
+    found += [f"{user}@{DOT_RE.sub('.', domain)}" for user, domain in OBFUSCATED_RE.findall(text)]
+
+    emails = []
+    for address in found:
+        address = unquote(address).strip().lower().rstrip(".")   # "mailto:%20info@..."
+        if (EMAIL_RE.fullmatch(address) and address.rpartition(".")[2] not in NOT_A_TLD
+                and address not in emails):
+            emails.append(address)
+    return emails
+
+
+# ─────────────────────────────────────────────
+# Fetching
+# ─────────────────────────────────────────────
+def _read_capped(resp) -> bytes:
+    chunks, size = [], 0
+    for chunk in resp.iter_content(chunk_size=CHUNK_BYTES):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= ENRICH_MAX_PAGE_BYTES:
+            break   # closing the response drops the rest unread
+    return b"".join(chunks)[:ENRICH_MAX_PAGE_BYTES]
+
+
+def scan_page(url: str) -> dict | None:
+    """{"emails": [...]} for one page, revalidated against the disk cache; None if it can't be read."""
+    cached  = _pages.get(url, None)
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    _host_limiter(urlsplit(url).hostname or "").acquire()
+    try:
+        with metrics.timed("http", "get"), \
+                http_session().get(url, headers=headers, stream=True, timeout=ENRICH_TIMEOUT_SECONDS) as resp:
+            if resp.status_code == 304 and cached:
+                return cached
+            content_type = resp.headers.get("Content-Type", "")
+            if resp.status_code != 200 or not content_type.startswith(("text/", "application/xhtml")):
+                return None
+            body     = _read_capped(resp)
+            encoding = resp.encoding or "utf-8"
+            validators = {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+    except Exception as e:
+        print(f"  [ENRICH] Couldn't fetch {url}: {e}")
+        return None
+
+    try:
+        page = body.decode(encoding, errors="ignore")
+    except LookupError:
+        page = body.decode("utf-8", errors="ignore")
+    result = {"emails": extract_emails(page), **validators}
+    _pages.set(url, result)
+    return result
+
+
+def find_email(url: str) -> str | None:
+    """The first address on the business's source page that isn't the directory's own, or None."""
+    result = scan_page(url)
+    if result is None:
+        return None
+    # a directory's own addresses (support@justdial.com) aren't the business's
+    emails = [e for e in result["emails"] if not _filter.is_blocked_domain(e.rpartition("@")[2])]
+    return emails[0] if emails else None
+
+
+def enrich_businesses(businesses: list[dict]) -> list[dict]:
+    """
+    Set email_address on each business whose snippet and URL have no
+    address but whose pages do. Pages are fetched concurrently; returns the
+    same list.
+    """
+    todo = [b for b in businesses
+            if not b.get("email_address") and not EMAIL_RE.search(f"{b.get('snippet', '')} {b.get('source_url', '')}")]
+    if not todo:
+        return businesses
+
+    futures = {_executor.submit(find_email, b["source_url"]): b for b in todo if b.get("source_url")}
+    found = 0
+    for future in as_completed(futures):
+        email = future.result()
+        if email:
+            futures[future]["email_address"] = email
+            found += 1
+    _pages.save()
+    print(f"[ENRICH] Found {found} of {len(todo)} missing email address(es) on business pages.")
+    return businesses
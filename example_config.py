@@ -7,10 +7,22 @@ GOOGLE_CREDENTIALS_FILE = "credentials.json"
 # The ID of your Google Sheet (from the URL)
 GOOGLE_SHEET_ID = "YOUR_GOOGLE_SHEET_ID_HERE"
 
+# Refresh the Google OAuth token this long before it expires
+SHEETS_TOKEN_REFRESH_MARGIN_SECONDS = 300
+
 # Sheet names (tabs) - script will auto-create these if missing
 SHEET_ALL_BUSINESSES = "All Businesses"
 SHEET_LEADS          = "Leads"
 
+# Row updates / lead appends are buffered and written in one API call once
+# this many are queued or the oldest has waited this long (and at cycle end)
+SHEET_FLUSH_ROWS    = 25
+SHEET_FLUSH_SECONDS = 30
+
+# "All Businesses" is mirrored into a local SQLite file; re-check the sheet
+# for changes made elsewhere at most this often
+MIRROR_SYNC_SECONDS = 30
+
 # ─────────────────────────────────────────────
 # 2. GMAIL — SMTP for sending, IMAP for reading
 # ─────────────────────────────────────────────
@@ -19,6 +31,27 @@ GMAIL_ADDRESS  = "your-email@gmail.com"
 # (requires 2FA to be ON)
 GMAIL_APP_PASSWORD = "xxxx xxxx xxxx xxxx"
 
+# Reopen the SMTP session if it has been idle this long (Gmail drops idle ones)
+SMTP_IDLE_TIMEOUT_SECONDS = 60
+
+# Email run: parallel AI writers, and how fast finished emails go out
+# (EMAIL_SEND_RATE_PER_MINUTE is per sender account)
+EMAIL_GEN_WORKERS          = 4
+EMAIL_SEND_RATE_PER_MINUTE = 20
+EMAIL_QUEUE_SIZE           = 20   # emails buffered between stages
+
+# Cold emails can be spread over several Gmail accounts to raise the daily
+# volume. Leave empty to send everything from GMAIL_ADDRESS. Each account
+# needs its own App Password; daily_limit / per_minute are optional and
+# default to SENDER_DAILY_LIMIT / EMAIL_SEND_RATE_PER_MINUTE (0 = no limit).
+# The account used is written to the "Sender Account" column, and replies are
+# read from every account that has sent something.
+SENDER_ACCOUNTS = [
+    # {"address": "you@gmail.com",  "app_password": "xxxx xxxx xxxx xxxx"},
+    # {"address": "you2@gmail.com", "app_password": "yyyy yyyy yyyy yyyy", "daily_limit": 300},
+]
+SENDER_DAILY_LIMIT = 400   # Gmail allows ~500/day; leave some room for replies
+
 # ─────────────────────────────────────────────
 # 3. GROQ — Free LLM API
 # ─────────────────────────────────────────────
@@ -26,6 +59,25 @@ GMAIL_APP_PASSWORD = "xxxx xxxx xxxx xxxx"
 GROQ_API_KEY = "gsk_..."
 GROQ_MODEL   = "llama-3.1-8b-instant"
 
+# Groq free-tier limits for the model above (requests / tokens per minute).
+# The token limit isn't enforced here; it's used to estimate how many emails
+# a minute the account can generate (printed after each email run).
+GROQ_REQUESTS_PER_MINUTE = 30
+GROQ_TOKENS_PER_MINUTE   = 6000
+GROQ_BURST               = 5
+
+# Generation budget per email: completion tokens, and how much of the search
+# snippet goes into the prompt
+EMAIL_MAX_TOKENS         = 300
+EMAIL_SNIPPET_MAX_TOKENS = 60
+
+# Generated emails are cached on disk so retries/reruns don't pay for them again
+EMAIL_CACHE_ENABLED   = True
+EMAIL_CACHE_MAX_BYTES = 5 * 1024 * 1024   # least-recently-used entries evicted past this
+
+# Replies classified per LLM request when polling
+CLASSIFY_BATCH_SIZE = 20
+
 # ─────────────────────────────────────────────
 # 4. SCRAPING — Rotating niches & cities
 # ─────────────────────────────────────────────
@@ -45,7 +97,103 @@ CITIES = [
     "Toronto",
 ]
 
+# How many (niche, city) combos to scrape per cycle, and hits per search
+COMBOS_PER_CYCLE  = 5
+RESULTS_PER_QUERY = 10
+
+# Search results whose title or snippet contains any of these (case-insensitive)
+# are news/listicles, not businesses, and are dropped
+SKIP_KEYWORDS = ["wikipedia", "news", "article", "blog", "how to", "what is", "top 10", "best in"]
+
+# Social networks and directories — a link to one of these isn't the business's
+# own website. Each entry also covers its subdomains (m.facebook.com), but not
+# look-alikes (notfacebook.com, facebook.com.example.net) — nor other country
+# sites, so list the yelp.com.au / google.co.uk variants for the CITIES you search.
+SKIP_DOMAINS = [
+    "facebook.com", "facebook.com.au", "instagram.com", "twitter.com", "linkedin.com",
+    "yelp.com", "yelp.co.uk", "yelp.com.au", "yelp.ca",
+    "google.com", "google.co.in", "google.co.uk", "google.com.au", "google.ca",
+    "justdial.com", "sulekha.com", "indiamart.com", "urbanclap.com", "urbancompany.com",
+]
+
+# Combos are scheduled in rounds: none repeats until all have been searched.
+# A combo whose last search found no new businesses sits out the next
+# 1, 3, 7, ... rounds, up to this many.
+COMBO_MAX_COOLDOWN_ROUNDS = 8
+
+# Raw search results are cached per query; a repeat within this window
+# reuses them instead of spending a rate-limited search.
+SEARCH_CACHE_TTL_SECONDS = 3 * 24 * 3600
+
+# Concurrency for the scrape cycle.
+# SCRAPE_MAX_WORKERS caps how many searches are in flight at once;
+# the token bucket caps how fast they actually reach DuckDuckGo.
+SCRAPE_MAX_WORKERS     = 4
+SEARCH_RATE_PER_SECOND = 0.5   # average searches per second (0 = unlimited)
+SEARCH_BURST           = 2     # searches allowed back-to-back before throttling
+
+# New businesses are appended to the sheet in batches of this many rows while
+# the cycle runs. Finished combos are checkpointed after each batch, so an
+# interrupted cycle resumes with the combos it hadn't finished.
+SCRAPE_WRITE_BATCH = 50
+
+# DNS checks for "has their own website?"
+DNS_MAX_WORKERS          = 16
+DNS_TIMEOUT_SECONDS      = 3
+DNS_POSITIVE_TTL_SECONDS = 7 * 24 * 3600   # domain resolved → re-check weekly
+DNS_NEGATIVE_TTL_SECONDS = 24 * 3600       # domain didn't resolve → re-check daily
+
+# Email enrichment: a business whose snippet shows no email gets its source
+# page fetched and scanned for addresses before it goes into the sheet.
+ENRICH_MAX_WORKERS          = 8
+ENRICH_MAX_PAGE_BYTES       = 256 * 1024    # stop reading a page after this much
+ENRICH_TIMEOUT_SECONDS      = 10
+ENRICH_HOST_RATE_PER_SECOND = 1             # requests per second to any one host (0 = unlimited)
+ENRICH_CACHE_TTL_SECONDS    = 7 * 24 * 3600 # how long a page's ETag / Last-Modified is kept
+
 # ─────────────────────────────────────────────
 # 5. POLLING CONFIG
 # ─────────────────────────────────────────────
 POLL_INTERVAL_SECONDS = 120
+
+# Messages fetched per IMAP command
+IMAP_FETCH_BATCH = 50
+
+# Only the text part of a reply is downloaded, and only this many bytes of it
+# (attachments and images are skipped). Quoted history is cut off before the
+# text is classified.
+IMAP_BODY_MAX_BYTES = 8192
+
+# In "poll" mode, wait for new mail with IMAP IDLE instead of sleeping.
+# IMAP_IDLE_SECONDS is how long to stay in IDLE before re-checking anyway
+# (Gmail drops IDLE connections after ~29 minutes).
+IMAP_USE_IDLE     = True
+IMAP_IDLE_SECONDS = 600
+
+# New leads are emailed to GMAIL_ADDRESS as one digest. A lead waits at most
+# this long for others to join it (0 = send at the end of each poll cycle).
+LEAD_DIGEST_MAX_DELAY_SECONDS = 0
+
+# ─────────────────────────────────────────────
+# 6. LOCAL STATE
+# ─────────────────────────────────────────────
+# Folder for caches and other local state kept between runs
+CACHE_DIR = ".cache"
+
+# Per-run JSON metrics summaries (call counts, errors, latency, LLM tokens)
+METRICS_DIR = ".cache/metrics"
+
+# Prometheus text file, refreshed after every run and every poll.
+# Point this into node_exporter's --collector.textfile.directory to scrape it.
+METRICS_PROM_FILE = ".cache/metrics/agent.prom"
+
+# ─────────────────────────────────────────────
+# 7. DAEMON MODE (python main.py daemon)
+# ─────────────────────────────────────────────
+# Each stage starts again this long after its previous run finished.
+# Polling uses POLL_INTERVAL_SECONDS above.
+DAEMON_SCRAPE_INTERVAL_SECONDS = 3600
+DAEMON_EMAIL_INTERVAL_SECONDS  = 900
+
+# On Ctrl+C / SIGTERM, wait this long for running stages before exiting
+DAEMON_SHUTDOWN_GRACE_SECONDS = 60
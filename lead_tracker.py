@@ -1,26 +1,29 @@
+import base64
 import imaplib
 import email
+import json
+import os
+import quopri
+import re
+import select
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from email.header import decode_header
-from config import GMAIL_ADDRESS, GMAIL_APP_PASSWORD
-from ai import classify_reply
-from sheets import get_sheets_service, get_contacted_businesses, update_row, add_lead
-from email_sender import send_email
+from email.utils import parseaddr
+from config import (GMAIL_ADDRESS, GMAIL_APP_PASSWORD, IMAP_FETCH_BATCH, IMAP_BODY_MAX_BYTES,
+                    LEAD_DIGEST_MAX_DELAY_SECONDS)
+from disk_cache import cache_path, write_json_atomic
+from ai import classify_replies
+from sheets import get_sheets_service, get_contacted_businesses, SheetWriter
+from email_sender import send_email, sender_password
+import metrics
 
 
 IMAP_SERVER = "imap.gmail.com"
 
 
-def connect_imap():
-    try:
-        mail = imaplib.IMAP4_SSL(IMAP_SERVER)
-        mail.login(GMAIL_ADDRESS, GMAIL_APP_PASSWORD)
-        print("[TRACKER] Connected to Gmail IMAP.")
-        return mail
-    except Exception as e:
-        print(f"[TRACKER] IMAP connection failed: {e}")
-        return None
-
-
 def decode_subject(subject_raw) -> str:
     parts = decode_header(subject_raw)
     decoded = []
@@ -32,88 +35,679 @@ def decode_subject(subject_raw) -> str:
     return " ".join(decoded)
 
 
-def fetch_unread_emails() -> list[dict]:
-    mail = connect_imap()
-    if not mail:
-        return []
+# Where quoted history starts in a reply: "On <date>, <name> wrote:" (may wrap
+# onto a second line), Outlook's "Original Message" / underscore rule, or an
+# Outlook header block ("From: ..." followed by "Sent:" / "Date:").
+QUOTE_HEADER_RE = re.compile(
+    r"^(?:On\s[^\n]*(?:\n[^\n]*)?\bwrote:[ \t]*$"
+    r"|-{2,}\s*Original Message\s*-{2,}"
+    r"|_{10,}[ \t]*$"
+    r"|From:\s[^\n]*\n(?:[^\n]*\n)?(?:Sent|Date):)",
+    re.MULTILINE | re.IGNORECASE)
+
+
+def _has_own_text(text: str) -> bool:
+    return any(line.strip() and not line.lstrip().startswith(">") for line in text.split("\n"))
+
+
+def split_quoted(text: str) -> tuple[str, str]:
+    """
+    Split a reply into (what they wrote, quoted history). Everything from a
+    reply header down is history when they wrote above it; otherwise (a
+    bottom-posted reply) only the header and the "> " lines are.
+    """
+    text  = text.replace("\r\n", "\n")
+    match = QUOTE_HEADER_RE.search(text)
+    tail  = ""
+    if match and _has_own_text(text[:match.start()]):
+        text, tail = text[:match.start()], text[match.start():]
+    elif match:
+        text, tail = text[:match.start()] + text[match.end():], match.group()
+
+    own, quoted = [], []
+    for line in text.split("\n"):
+        (quoted if line.lstrip().startswith(">") else own).append(line)
+    return "\n".join(own).strip(), "\n".join(quoted + [tail]).strip()
+
+
+# ─────────────────────────────────────────────
+# Partial fetch: BODYSTRUCTURE + headers, then only the text part
+# ─────────────────────────────────────────────
+HEADER_ITEM = "BODY.PEEK[HEADER.FIELDS (FROM SUBJECT)]"
+# Servers may echo the item back in another legal form (quoted field names,
+# different case), so the response is matched on this prefix only
+HEADER_KEY  = "BODY[HEADER"
+
+_OPEN, _CLOSE = object(), object()
+_TOKEN_RE     = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|([^\s()"\[]+(?:\[[^\]]*\][^\s()"]*)?))')
+_LITERAL_RE   = re.compile(rb"\{\d+\}$")
+
+
+def _scan(data: bytes):
+    """Tokens of one response line: _OPEN / _CLOSE, atoms as str (NIL as None), quoted strings as bytes."""
+    pos = 0
+    while True:
+        m = _TOKEN_RE.match(data, pos)
+        if not m or m.end() == pos:
+            return
+        pos = m.end()
+        opening, closing, quoted, atom = m.groups()
+        if opening:
+            yield _OPEN
+        elif closing:
+            yield _CLOSE
+        elif quoted is not None:
+            yield re.sub(rb"\\(.)", rb"\1", quoted)
+        else:
+            atom = atom.decode()
+            yield None if atom.upper() == "NIL" else atom
+
+
+def _fetch_tokens(msg_data):
+    # imaplib hands back literals as (line ending in "{n}", literal bytes) tuples
+    for part in msg_data:
+        if isinstance(part, tuple):
+            head, literal = part
+            yield from _scan(_LITERAL_RE.sub(b"", head.rstrip()))
+            yield literal
+        elif part:
+            yield from _scan(part)
+
+
+def parse_fetch(msg_data) -> list[dict]:
+    """Turn a FETCH response into one {ITEM NAME: value} dict per message; lists stay nested."""
+    tokens = _fetch_tokens(msg_data)
+
+    def read_list() -> list:
+        out = []
+        for tok in tokens:
+            if tok is _OPEN:
+                out.append(read_list())
+            elif tok is _CLOSE:
+                return out
+            else:
+                out.append(tok)
+        return out
+
+    messages = []
+    for tok in tokens:
+        if tok is _OPEN:   # "* <seq> FETCH (" — the sequence number and FETCH are skipped
+            items = read_list()
+            messages.append({str(k).upper(): v for k, v in zip(items[::2], items[1::2])})
+    return messages
+
+
+def _text(value) -> str:
+    return value.decode(errors="ignore") if isinstance(value, bytes) else (value or "")
+
+
+def find_text_part(structure: list, section: str = "") -> tuple[str, str, str] | None:
+    """
+    (section, transfer encoding, charset) of the first text/plain part in a
+    BODYSTRUCTURE, depth-first. A single-part message is section "1"; a
+    single-part text/html one is used as-is, like before.
+    """
+    if not structure:
+        return None
+    if isinstance(structure[0], list):   # multipart: child parts first, then the subtype
+        children = []
+        for child in structure:
+            if not isinstance(child, list):
+                break
+            children.append(child)
+        for i, child in enumerate(children, 1):
+            found = find_text_part(child, f"{section}.{i}" if section else str(i))
+            if found:
+                return found
+        return None
 
-    emails = []
+    maintype, subtype = _text(structure[0]).lower(), _text(structure[1]).lower()
+    if maintype != "text" or (subtype != "plain" and section):
+        return None
+    params  = [_text(p).lower() for p in (structure[2] or [])]
+    charset = dict(zip(params[::2], params[1::2])).get("charset", "utf-8")
+    return section or "1", _text(structure[5] or "7bit").lower(), charset
+
+
+def decode_part(data: bytes, encoding: str, charset: str) -> str:
+    """Decode a (possibly truncated) body part."""
+    if encoding == "base64":
+        data = re.sub(rb"[^A-Za-z0-9+/=]", b"", data)
+        data = base64.b64decode(data[:len(data) // 4 * 4])
+    elif encoding == "quoted-printable":
+        data = quopri.decodestring(data)
     try:
-        mail.select("INBOX")
-        _, data = mail.search(None, "UNSEEN")
-        mail_ids = data[0].split()
-
-        for mail_id in mail_ids:
-            _, msg_data = mail.fetch(mail_id, "(RFC822)")
-            for response_part in msg_data:
-                if isinstance(response_part, tuple):
-                    msg = email.message_from_bytes(response_part[1])
-
-                    sender  = msg.get("From", "")
-                    subject = decode_subject(msg.get("Subject", ""))
-
-                    body = ""
-                    if msg.is_multipart():
-                        for part in msg.walk():
-                            if part.get_content_type() == "text/plain":
-                                body = part.get_payload(decode=True).decode("utf-8", errors="ignore")
-                                break
-                    else:
-                        body = msg.get_payload(decode=True).decode("utf-8", errors="ignore")
-
-                    emails.append({
-                        "sender":  sender,
-                        "subject": subject,
-                        "body":    body,
-                    })
-
-            mail.store(mail_id, "+FLAGS", "\\Seen")
+        return data.decode(charset, errors="ignore")
+    except LookupError:
+        return data.decode("utf-8", errors="ignore")
+
+
+# ─────────────────────────────────────────────
+# Persistent IMAP session
+# ─────────────────────────────────────────────
+STATE_FILE        = "imap_state.json"
+IDLE_DONE_TIMEOUT = 30   # seconds to wait for the server to confirm the end of IDLE
+
+# Every inbox's watermark lives in STATE_FILE, and inboxes are polled on
+# concurrent threads, so each read-modify-write of it holds this lock.
+_state_lock = threading.Lock()
+
+
+class IMAPSession:
+    """
+    One logged-in IMAP connection kept open across polls. Remembers the highest
+    UID it has processed (per UIDVALIDITY, saved to disk) so each poll only
+    asks for newer messages and fetches them in batched UID FETCH commands.
+    """
+
+    def __init__(self, address: str = GMAIL_ADDRESS, password: str = GMAIL_APP_PASSWORD,
+                 host: str = IMAP_SERVER, mailbox: str = "INBOX",
+                 port: int | None = None, use_ssl: bool = True):
+        self.address     = address
+        self.password    = password
+        self.host        = host
+        self.port        = port
+        self.use_ssl     = use_ssl   # False only for local test servers
+        self.mailbox     = mailbox
+        self.uidvalidity = None
+        self.last_uid    = 0
+        self._mail       = None
+        self._lock       = threading.RLock()
+        self._state_key  = f"{address}/{mailbox}"
+
+    # ── connection ──
+    def _connect(self):
+        with metrics.timed("imap", "connect"):
+            if self.use_ssl:
+                mail = imaplib.IMAP4_SSL(self.host, self.port or imaplib.IMAP4_SSL_PORT)
+            else:
+                mail = imaplib.IMAP4(self.host, self.port or imaplib.IMAP4_PORT)
+            mail.login(self.address, self.password)
+            mail.select(self.mailbox)
+        print("[TRACKER] Connected to Gmail IMAP.")
 
+        uidvalidity = int(mail.response("UIDVALIDITY")[1][0])
+        saved = self._load_state()
+        if saved.get("uidvalidity") == uidvalidity:
+            self.last_uid = saved.get("last_uid", 0)
+        else:
+            self.last_uid = 0   # mailbox was rebuilt — old UIDs mean nothing
+        self.uidvalidity = uidvalidity
+        self._mail = mail
+
+    def _ensure(self):
+        if self._mail is not None:
+            try:
+                self._mail.noop()
+                return self._mail
+            except (imaplib.IMAP4.abort, OSError):
+                self._mail = None
+        self._connect()
+        return self._mail
+
+    def close(self):
+        with self._lock:
+            if self._mail is None:
+                return
+            try:
+                self._mail.logout()
+            except Exception:
+                pass
+            self._mail = None
+
+    # ── watermark ──
+    def _load_state(self) -> dict:
+        try:
+            with open(cache_path(STATE_FILE), "r") as f:
+                return json.load(f).get(self._state_key, {})
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_state(self):
+        path = cache_path(STATE_FILE)
+        with _state_lock:
+            try:
+                with open(path, "r") as f:
+                    state = json.load(f)
+            except (FileNotFoundError, ValueError):
+                state = {}
+            state[self._state_key] = {"uidvalidity": self.uidvalidity, "last_uid": self.last_uid}
+            write_json_atomic(path, state)
+
+    # ── fetching ──
+    def fetch_new(self) -> list[dict]:
+        """Fetch unread messages newer than the saved UID watermark and mark them seen."""
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    return self._fetch_new()
+                except (imaplib.IMAP4.abort, OSError) as e:
+                    self._mail = None
+                    if attempt == 2:
+                        raise
+                    print(f"[TRACKER] IMAP connection lost ({e}). Reconnecting...")
+
+    def _fetch_new(self) -> list[dict]:
+        mail = self._ensure()
+
+        with metrics.timed("imap", "search"):
+            if self.last_uid:
+                # "n:*" always matches the newest message, even if it's below n
+                _, data = mail.uid("SEARCH", None, f"UID {self.last_uid + 1}:* UNSEEN")
+            else:
+                _, data = mail.uid("SEARCH", None, "UNSEEN")
+        uids = sorted(int(u) for u in data[0].split() if int(u) > self.last_uid)
+
+        emails = []
+        for i in range(0, len(uids), IMAP_FETCH_BATCH):
+            batch   = uids[i:i + IMAP_FETCH_BATCH]
+            uid_set = ",".join(str(u) for u in batch)
+            emails += self._fetch_batch(mail, uid_set)
+
+            with metrics.timed("imap", "store"):
+                mail.uid("STORE", uid_set, "+FLAGS", "(\\Seen)")
+            self.last_uid = batch[-1]
+            self._save_state()
+
+        return emails
+
+    def _fetch_batch(self, mail, uid_set: str) -> list[dict]:
+        """
+        Two round trips per batch: structure + From/Subject for every message,
+        then the first IMAP_BODY_MAX_BYTES of each text/plain part (one FETCH
+        per distinct section number). Attachments are never downloaded.
+        """
+        with metrics.timed("imap", "fetch"):
+            _, msg_data = mail.uid("FETCH", uid_set, f"(UID BODYSTRUCTURE {HEADER_ITEM})")
+
+        by_uid, sections = {}, {}
+        for item in parse_fetch(msg_data):
+            if "UID" not in item:
+                continue   # unsolicited "* n FETCH (FLAGS ...)" left over from a NOOP
+            raw     = next((v for k, v in item.items() if k.upper().startswith(HEADER_KEY)), None)
+            headers = email.message_from_bytes(raw if isinstance(raw, bytes) else b"")
+            uid = int(item["UID"])
+            by_uid[uid] = {
+                "uid":     uid,
+                "sender":  headers.get("From", ""),
+                "subject": decode_subject(headers.get("Subject", "")),
+                "body":    "",
+                "quoted":  "",
+            }
+            part = find_text_part(item.get("BODYSTRUCTURE"))
+            if part:
+                sections.setdefault(part[0], {})[uid] = part[1:]
+
+        for section, parts in sections.items():
+            with metrics.timed("imap", "fetch"):
+                _, msg_data = mail.uid("FETCH", ",".join(str(u) for u in parts),
+                                       f"(BODY.PEEK[{section}]<0.{IMAP_BODY_MAX_BYTES}>)")
+            for item in parse_fetch(msg_data):
+                if "UID" not in item:
+                    continue
+                uid  = int(item["UID"])
+                data = next((v for k, v in item.items() if k.startswith("BODY[")), None)
+                if uid in parts and isinstance(data, bytes):
+                    text = decode_part(data, *parts[uid])
+                    by_uid[uid]["body"], by_uid[uid]["quoted"] = split_quoted(text)
+
+        return list(by_uid.values())
+
+    # ── push ──
+    def supports_idle(self) -> bool:
+        with self._lock:
+            return "IDLE" in self._ensure().capabilities
+
+    def wait_for_mail(self, timeout: float) -> bool:
+        """
+        Block in IMAP IDLE until the server reports new mail or `timeout`
+        seconds pass. Returns True if new mail arrived.
+        """
+        with self._lock:
+            mail = self._ensure()
+            tag  = mail._new_tag()
+            mail.send(tag + b" IDLE\r\n")
+            if not mail.readline().startswith(b"+"):
+                raise imaplib.IMAP4.error("Server refused IDLE")
+
+            got_mail = False
+            deadline = time.monotonic() + timeout
+            try:
+                try:
+                    while not got_mail:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        ready, _, _ = select.select([mail.socket()], [], [], remaining)
+                        if not ready:
+                            break
+                        line = mail.readline()
+                        if not line:
+                            raise imaplib.IMAP4.abort("Connection closed during IDLE")
+                        got_mail = b"EXISTS" in line
+                finally:
+                    self._end_idle(mail, tag)
+            except (imaplib.IMAP4.abort, OSError):
+                # the connection is unusable; drop it without a LOGOUT that could hang too
+                self._mail = None
+                try:
+                    mail.shutdown()
+                except OSError:
+                    pass
+                raise
+            return got_mail
+
+    @staticmethod
+    def _end_idle(mail, tag: bytes):
+        """Send DONE and read up to the IDLE command's tagged reply."""
+        sock = mail.socket()
+        previous = sock.gettimeout()
+        sock.settimeout(IDLE_DONE_TIMEOUT)   # a server that never answers can't block us forever
+        try:
+            mail.send(b"DONE\r\n")
+            while True:
+                line = mail.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("Connection closed while leaving IDLE")
+                if line.startswith(tag):
+                    return
+        finally:
+            sock.settimeout(previous)
+
+
+_sessions = {}   # lowercased address -> IMAPSession
+_session_lock = threading.Lock()
+
+
+def get_imap_session(address: str = GMAIL_ADDRESS) -> IMAPSession:
+    """The process-wide IMAP session for one inbox (GMAIL_ADDRESS by default)."""
+    with _session_lock:
+        key = address.lower()
+        if key not in _sessions:
+            _sessions[key] = IMAPSession(address=address, password=sender_password(address))
+        return _sessions[key]
+
+
+def close_imap_sessions():
+    with _session_lock:
+        sessions = list(_sessions.values())
+    for session in sessions:
+        session.close()
+
+
+def _fetch_inbox(address: str) -> list[dict]:
+    try:
+        emails = get_imap_session(address).fetch_new()
     except Exception as e:
-        print(f"[TRACKER] Error fetching emails: {e}")
-    finally:
-        mail.logout()
-
-    print(f"[TRACKER] Fetched {len(emails)} unread email(s).")
+        print(f"[TRACKER] Error fetching emails for {address}: {e}")
+        return []
+    for em in emails:
+        em["inbox"] = address
     return emails
 
 
-def match_reply_to_business(email_data: dict, contacted: list[dict]) -> dict | None:
-    sender_email = email_data["sender"].lower()
-    subject      = email_data["subject"].lower()
-    body         = email_data["body"].lower()
-
-    for biz in contacted:
-        biz_email = biz.get("email_address", "").lower()
-        biz_name  = biz.get("business_name", "").lower()
-
-        if biz_email and biz_email in sender_email:
-            return biz
+def fetch_unread_emails(addresses=None) -> list[dict]:
+    """New mail from every inbox in `addresses` (default: just GMAIL_ADDRESS), fetched concurrently."""
+    inboxes = list({a.lower(): a for a in (addresses or [GMAIL_ADDRESS]) if a}.values())
+    if len(inboxes) == 1:
+        emails = _fetch_inbox(inboxes[0])
+    else:
+        with ThreadPoolExecutor(max_workers=len(inboxes), thread_name_prefix="imap") as pool:
+            emails = [em for batch in pool.map(_fetch_inbox, inboxes) for em in batch]
 
-        name_words = biz_name.split()[:2]
-        name_short = " ".join(name_words)
-        if len(name_short) > 3 and (name_short in subject or name_short in body):
-            return biz
-
-    return None
+    print(f"[TRACKER] Fetched {len(emails)} unread email(s) from {len(inboxes)} inbox(es).")
+    return emails
 
 
-def send_lead_notification(business_name: str, classification: str, reply_body: str):
-    subject = f"New Lead Found: {business_name}"
-    body = (
-        f"Hi! Your AI agent found a new lead.\n\n"
-        f"Business: {business_name}\n"
-        f"Classification: {classification}\n\n"
-        f"Their reply:\n"
-        f"---\n"
-        f"{reply_body[:500]}\n"
-        f"---\n\n"
-        f"Check your 'Leads' sheet in Google Sheets for full details."
-    )
-    send_email(GMAIL_ADDRESS, subject, body)
+# ─────────────────────────────────────────────
+# Matching replies to contacted businesses
+# ─────────────────────────────────────────────
+# Shared mailbox providers — a reply from one of these domains says nothing
+# about which business sent it, so they are never used for domain matching.
+FREEMAIL_DOMAINS = {
+    "gmail.com", "googlemail.com", "yahoo.com", "yahoo.co.in", "yahoo.co.uk",
+    "hotmail.com", "outlook.com", "live.com", "msn.com", "icloud.com", "me.com",
+    "aol.com", "protonmail.com", "proton.me", "gmx.com", "mail.com", "zoho.com",
+    "rediffmail.com", "yandex.com",
+}
+
+
+class _Automaton:
+    """
+    Aho-Corasick automaton over {pattern: rank}. best(text) returns the lowest
+    rank of any pattern occurring in text, in a single pass over the text.
+    """
+
+    def __init__(self, patterns: dict[str, int]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]
+
+        for pattern, rank in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                node = nxt
+            if self._best[node] is None or rank < self._best[node]:
+                self._best[node] = rank
+
+        # breadth-first: fail links, and fold each node's fail-chain best into it
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                inherited = self._best[self._fail[nxt]]
+                if inherited is not None and (self._best[nxt] is None or inherited < self._best[nxt]):
+                    self._best[nxt] = inherited
+                queue.append(nxt)
+
+    def best(self, text: str) -> int | None:
+        goto, fail, best_at = self._goto, self._fail, self._best
+        node = 0
+        best = None
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            rank = best_at[node]
+            if rank is not None and (best is None or rank < best):
+                best = rank
+        return best
+
+
+class ReplyMatcher:
+    """
+    Index over the contacted businesses, built once per poll cycle:
+    sender address and sender domain are hash lookups, and the short business
+    names are matched with one automaton pass over subject and body.
+    Like the original linear scan, the earliest business in `contacted` that
+    matches by address or name wins; a domain match is only a fallback.
+    """
+
+    def __init__(self, contacted: list[dict]):
+        self.contacted  = contacted
+        self._by_email  = {}
+        self._by_domain = {}
+        names = {}
+
+        for rank, biz in enumerate(contacted):
+            biz_email = biz.get("email_address", "").strip().lower()
+            if biz_email:
+                self._by_email.setdefault(biz_email, rank)
+                domain = biz_email.rpartition("@")[2]
+                if domain and domain not in FREEMAIL_DOMAINS:
+                    self._by_domain.setdefault(domain, rank)
+
+            name_short = " ".join(biz.get("business_name", "").lower().split()[:2])
+            if len(name_short) > 3:
+                names.setdefault(name_short, rank)
+
+        self._names = _Automaton(names)
+
+    def match(self, email_data: dict) -> dict | None:
+        sender = parseaddr(email_data["sender"])[1].lower()
+
+        candidates = []
+        if sender in self._by_email:
+            candidates.append(self._by_email[sender])
+        # the quoted history usually contains our own cold email, name and all
+        for text in (email_data["subject"], email_data["body"], email_data.get("quoted", "")):
+            rank = self._names.best(text.lower())
+            if rank is not None:
+                candidates.append(rank)
+
+        if not candidates:
+            rank = self._by_domain.get(sender.rpartition("@")[2])
+            if rank is None:
+                return None
+            candidates.append(rank)
+
+        return self.contacted[min(candidates)]
+
+
+def match_reply_to_business(email_data: dict, contacted) -> dict | None:
+    """`contacted` is either a ReplyMatcher or the raw list of contacted businesses."""
+    matcher = contacted if isinstance(contacted, ReplyMatcher) else ReplyMatcher(contacted)
+    return matcher.match(email_data)
+
+
+# ─────────────────────────────────────────────
+# Lead notifications
+# ─────────────────────────────────────────────
+DIGEST_FILE      = "lead_digest.json"
+DIGEST_REPLY_LEN = 500   # characters of each reply quoted in the digest
+DIGEST_RETRY_MIN = 60    # seconds before retrying a digest that failed to send,
+DIGEST_RETRY_MAX = 3600  # doubling per consecutive failure up to this
+
+
+class LeadDigest:
+    """
+    Collects new leads and emails them to GMAIL_ADDRESS as one digest instead
+    of one notification each. A lead waits at most `max_delay` seconds
+    (0 = the digest goes out at the end of the poll cycle that found it).
+    Pending leads are kept in .cache/lead_digest.json, so a restart doesn't
+    lose them. After a failed send the next attempt backs off
+    (DIGEST_RETRY_MIN, doubling up to DIGEST_RETRY_MAX).
+    """
+
+    def __init__(self, max_delay: float = LEAD_DIGEST_MAX_DELAY_SECONDS, filename: str = DIGEST_FILE):
+        self.max_delay = max_delay
+        self.path      = cache_path(filename)
+        self.pending   = []   # {"business_name", "classification", "reply", "at"}
+        self.failures  = 0    # consecutive failed sends
+        self.retry_at  = 0.0  # no send attempt before this time
+        self._lock     = threading.Lock()
+        try:
+            with open(self.path, "r") as f:
+                self.pending = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def _save(self):
+        if not self.pending:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        write_json_atomic(self.path, self.pending)
+
+    def add(self, business_name: str, classification: str, reply_body: str):
+        with self._lock:
+            self.pending.append({
+                "business_name":  business_name,
+                "classification": classification,
+                "reply":          reply_body[:DIGEST_REPLY_LEN],
+                "at":             time.time(),
+            })
+            self._save()
+
+    def due_in(self) -> float:
+        """Seconds until the digest should go out; inf if there's nothing pending."""
+        with self._lock:
+            if not self.pending:
+                return float("inf")
+            due = max(self.pending[0]["at"] + self.max_delay, self.retry_at)
+            return max(0.0, due - time.time())
+
+    def send_if_due(self) -> bool:
+        """Email the pending leads if the oldest has waited long enough. True if a digest went out."""
+        if self.due_in() > 0:
+            return False
+        with self._lock:
+            leads = list(self.pending)
+        if not send_email(GMAIL_ADDRESS, *_digest_message(leads)):
+            with self._lock:   # keep them, and don't retry on every cycle while SMTP is down
+                self.failures += 1
+                delay = min(DIGEST_RETRY_MAX, DIGEST_RETRY_MIN * 2 ** (self.failures - 1))
+                self.retry_at = time.time() + delay
+            print(f"[TRACKER] Lead digest not sent; retrying in {delay}s.")
+            return False
+        with self._lock:
+            self.pending  = self.pending[len(leads):]
+            self.failures = 0
+            self.retry_at = 0.0
+            self._save()
+        return True
+
+
+def _digest_message(leads: list[dict]) -> tuple[str, str]:
+    if len(leads) == 1:
+        subject = f"New Lead Found: {leads[0]['business_name']}"
+    else:
+        subject = f"{len(leads)} New Leads Found"
+
+    parts = [f"Hi! Your AI agent found {len(leads)} new lead(s).\n"]
+    for lead in leads:
+        parts.append(
+            f"Business: {lead['business_name']}\n"
+            f"Classification: {lead['classification']}\n\n"
+            f"Their reply:\n"
+            f"---\n"
+            f"{lead['reply']}\n"
+            f"---\n"
+        )
+    parts.append("Check your 'Leads' sheet in Google Sheets for full details.")
+    return subject, "\n".join(parts)
+
+
+_digest = None
+_digest_lock = threading.Lock()
+
+
+def get_lead_digest() -> LeadDigest:
+    global _digest
+    with _digest_lock:
+        if _digest is None:
+            _digest = LeadDigest()
+        return _digest
+
+
+# ─────────────────────────────────────────────
+# Poll cycle
+# ─────────────────────────────────────────────
+def poll_for_replies():
+    """
+    One poll cycle: match new replies, classify them, write every status
+    change and Leads row in one flush, then send the lead digest if it's due.
+    """
+    digest = get_lead_digest()
+    try:
+        _process_replies(digest)
+    finally:
+        digest.send_if_due()
 
 
-def poll_for_replies():
+def _process_replies(digest: LeadDigest):
     service = get_sheets_service()
     contacted = get_contacted_businesses(service)
 
@@ -121,35 +715,57 @@ def poll_for_replies():
         print("[TRACKER] No contacted businesses to match against.")
         return
 
-    unread = fetch_unread_emails()
+    # replies land in whichever account sent the cold email
+    unread = fetch_unread_emails({biz.get("sender") or GMAIL_ADDRESS for biz in contacted})
     if not unread:
         print("[TRACKER] No unread emails. Nothing to process.")
         return
 
+    matcher = ReplyMatcher(contacted)
+
+    matched = []
     for em in unread:
         print(f"\n[TRACKER] Processing email from: {em['sender']}")
 
-        matched_biz = match_reply_to_business(em, contacted)
+        matched_biz = match_reply_to_business(em, matcher)
         if not matched_biz:
             print("  [SKIP] Couldn't match to any contacted business.")
             continue
 
-        biz_name = matched_biz["business_name"]
-        print(f"  [MATCH] Matched to: {biz_name}")
-
-        classification = classify_reply(em["body"], biz_name)
+        print(f"  [MATCH] Matched to: {matched_biz['business_name']}")
+        matched.append((em, matched_biz))
 
-        notes = f"Reply received. Classification: {classification}"
-        if classification == "not_interested":
-            update_row(service, matched_biz["row_index"], status="Not Interested", email_sent="Yes", notes=notes)
-        else:
-            update_row(service, matched_biz["row_index"], status="Lead", email_sent="Yes",
-                       email_address=matched_biz.get("email_address", ""), notes=notes)
-
-            matched_biz["notes"] = notes
-            add_lead(service, matched_biz)
+    if not matched:
+        print("\n[TRACKER] Polling cycle complete.")
+        return
 
-            send_lead_notification(biz_name, classification, em["body"])
-            print(f"  [LEAD] {biz_name} is a LEAD!")
+    # One LLM request per CLASSIFY_BATCH_SIZE replies instead of one each
+    labels = classify_replies([
+        {"id": str(i), "business_name": biz["business_name"], "text": em["body"]}
+        for i, (em, biz) in enumerate(matched)
+    ])
+
+    # the whole cycle goes out in one flush: one batchUpdate + one Leads append
+    leads = []   # only put in the digest once they're in the Leads sheet
+    with SheetWriter(service, max_rows=float("inf")) as writer:
+        for i, (em, matched_biz) in enumerate(matched):
+            biz_name       = matched_biz["business_name"]
+            classification = labels[str(i)]
+
+            notes = f"Reply received. Classification: {classification}"
+            if classification == "not_interested":
+                writer.update_row(matched_biz["row_index"], status="Not Interested", email_sent="Yes", notes=notes)
+            else:
+                writer.update_row(matched_biz["row_index"], status="Lead", email_sent="Yes",
+                                  email_address=matched_biz.get("email_address", ""), notes=notes)
+
+                matched_biz["notes"] = notes
+                writer.add_lead(matched_biz)
+
+                leads.append((biz_name, classification, em["body"]))
+                print(f"  [LEAD] {biz_name} is a LEAD!")
+
+    for lead in leads:
+        digest.add(*lead)
 
     print("\n[TRACKER] Polling cycle complete.")
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+llm_cache.py — Persistent cache for generated emails, keyed on a hash of
+everything that determines the LLM output (prompt, model, sampling settings).
+Retries and reruns for the same business reuse the stored subject/body
+instead of paying for another generation. Least-recently-used entries are
+evicted once the cache grows past EMAIL_CACHE_MAX_BYTES.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from config import EMAIL_CACHE_MAX_BYTES
+from disk_cache import cache_path
+
+
+def cache_key(**inputs) -> str:
+    """Stable SHA-256 over the keyword arguments (order-independent)."""
+    blob = json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    def __init__(self, path: str | None = None, max_bytes: int = EMAIL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock     = threading.Lock()
+        self._db       = sqlite3.connect(path or cache_path("email_cache.sqlite3"),
+                                         check_same_thread=False)
+        with self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS generations (
+                    key       TEXT PRIMARY KEY,
+                    subject   TEXT NOT NULL,
+                    body      TEXT NOT NULL,
+                    size      INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON generations(last_used)")
+
+    def get(self, key: str) -> dict | None:
+        with self._lock, self._db:
+            row = self._db.execute("SELECT subject, body FROM generations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE generations SET last_used = ? WHERE key = ?", (time.time(), key))
+            return {"subject": row[0], "body": row[1]}
+
+    def put(self, key: str, subject: str, body: str):
+        size = len(subject.encode("utf-8")) + len(body.encode("utf-8"))
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO generations VALUES (?, ?, ?, ?, ?)",
+                             (key, subject, body, size, time.time()))
+            self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM generations").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM generations ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM generations WHERE key = ?", victims)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> GenerationCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GenerationCache()
+        return _cache
@@ -1,29 +1,46 @@
 import sys
 import time
-from scraper import run_scrape_cycle
-from sheets import get_sheets_service, write_businesses, get_pending_businesses, update_row
-from ai import generate_cold_email
-from email_sender import extract_email_from_snippet, send_email
-from lead_tracker import poll_for_replies
-from config import POLL_INTERVAL_SECONDS
+from config import (POLL_INTERVAL_SECONDS, IMAP_USE_IDLE, IMAP_IDLE_SECONDS, SCRAPE_WRITE_BATCH,
+                    DAEMON_SCRAPE_INTERVAL_SECONDS, DAEMON_EMAIL_INTERVAL_SECONDS)
+import metrics
+
+# Pipeline modules are imported inside the run_* functions, so each mode only
+# loads what it uses (e.g. "poll" never imports ddgs).
+# See benchmarks/bench_startup.py.
 
 def run_scrape_and_store():
+    from scraper import run_scrape_cycle, ScrapeCheckpoint
+    from sheets import get_sheets_service, get_all_business_names, SheetWriter
+
     print("\n" + "=" * 60)
     print("  STEP 1: SCRAPING BUSINESSES")
     print("=" * 60 + "\n")
 
-    businesses = run_scrape_cycle()
+    service    = get_sheets_service()
+    checkpoint = ScrapeCheckpoint()
+    found      = 0
 
-    if not businesses:
+    # Businesses are appended in small batches as combos finish; every flush
+    # checkpoints the combos whose rows are now in the sheet.
+    with SheetWriter(service, max_rows=SCRAPE_WRITE_BATCH, on_flush=checkpoint.save) as writer:
+        for business in run_scrape_cycle(checkpoint, get_all_business_names(service)):
+            writer.add_business(business)
+            found += 1
+        if writer.flush():
+            checkpoint.clear()
+
+    if not found:
         print("[MAIN] No businesses found this cycle. Try again later.")
         return
 
-    service = get_sheets_service()
-    write_businesses(service, businesses)
-    print(f"\n[MAIN] Scrape + Store complete. {len(businesses)} businesses processed.\n")
+    print(f"\n[MAIN] Scrape + Store complete. {found} businesses processed.\n")
 
 
 def run_email_pending():
+    from sheets import get_sheets_service, get_pending_businesses
+    from email_pipeline import run_email_pipeline
+    from ai import print_usage
+
     print("\n" + "=" * 60)
     print("  STEP 2: SENDING EMAILS TO PENDING BUSINESSES")
     print("=" * 60 + "\n")
@@ -35,52 +52,16 @@ def run_email_pending():
         print("[MAIN] No pending businesses to email.")
         return
 
-    emailed = 0
-    skipped = 0
-
-    for biz in pending:
-        print(f"\n[MAIN] Processing: {biz['business_name']} ({biz['niche']}, {biz['city']})")
-        email_addr = extract_email_from_snippet(biz.get("snippet", ""), biz.get("source_url", ""))
-
-        if not email_addr:
-            print(f"  [SKIP] No email address found for '{biz['business_name']}'. Skipping.")
-            update_row(service, biz["row_index"],
-                       status="No Email Found", email_sent="No",
-                       notes="Could not extract email from snippet or URL.")
-            skipped += 1
-            continue
-        
-        email_content = generate_cold_email(
-            business_name=biz["business_name"],
-            niche=biz["niche"],
-            city=biz["city"],
-            snippet=biz.get("snippet", ""),
-        )
-
-        success = send_email(
-            to_address=email_addr,
-            subject=email_content["subject"],
-            body=email_content["body"],
-        )
-
-        if success:
-            update_row(service, biz["row_index"],
-                       status="Contacted", email_sent="Yes",
-                       email_address=email_addr,
-                       notes=f"Email sent. Subject: {email_content['subject']}")
-            emailed += 1
-        else:
-            update_row(service, biz["row_index"],
-                       status="Email Failed", email_sent="No",
-                       email_address=email_addr,
-                       notes="SMTP send failed. Check logs.")
-            skipped += 1
-
-        time.sleep(2) 
-
-    print(f"\n[MAIN] Emailing complete. Sent: {emailed} | Skipped: {skipped}\n")
+    # generate → send → write run as overlapping stages
+    emailed, skipped = run_email_pipeline(service, pending)
+
+    print(f"\n[MAIN] Emailing complete. Sent: {emailed} | Skipped: {skipped}")
+    print_usage("generate")
+    print()
 
 def run_poll_once():
+    from lead_tracker import poll_for_replies
+
     print("\n" + "=" * 60)
     print("  STEP 3: POLLING FOR REPLIES")
     print("=" * 60 + "\n")
@@ -88,14 +69,59 @@ def run_poll_once():
     poll_for_replies()
 
 def run_poll_loop():
+    from lead_tracker import poll_for_replies, get_imap_session, get_lead_digest
+    from email_sender import sender_accounts
+
     print("\n" + "=" * 60)
     print(f"  CONTINUOUS POLL MODE (every {POLL_INTERVAL_SECONDS}s)")
     print("=" * 60 + "\n")
 
+    use_idle = IMAP_USE_IDLE
+    accounts = sender_accounts()
+    if use_idle and len(accounts) > 1:
+        print("[MAIN] Several sender inboxes to watch; polling them instead of IMAP IDLE.")
+        use_idle = False
+    inbox = accounts[0]["address"]   # the one inbox replies arrive in, when IDLE is used
     while True:
-        poll_for_replies()
-        print(f"\n[MAIN] Sleeping {POLL_INTERVAL_SECONDS}s before next poll... (Ctrl+C to stop)\n")
-        time.sleep(POLL_INTERVAL_SECONDS)
+        try:
+            poll_for_replies()
+        except Exception as e:   # e.g. Sheets down: keep watching, try again next cycle
+            print(f"[MAIN] Poll cycle failed: {e}")
+        metrics.write_prometheus()   # this mode never exits, so keep the scrape file fresh
+        # wake up in time to send a held-back lead digest
+        digest_due = max(1.0, get_lead_digest().due_in())
+
+        if use_idle:
+            session = get_imap_session(inbox)
+            try:
+                if not session.supports_idle():
+                    print("[MAIN] Server doesn't support IMAP IDLE. Falling back to polling.")
+                    use_idle = False
+                    continue
+                print("\n[MAIN] Waiting for new mail (IMAP IDLE)... (Ctrl+C to stop)\n")
+                session.wait_for_mail(min(IMAP_IDLE_SECONDS, digest_due))
+                continue
+            except Exception as e:
+                print(f"[MAIN] IDLE failed ({e}). Sleeping instead.")
+                session.close()
+
+        wait = min(POLL_INTERVAL_SECONDS, digest_due)
+        print(f"\n[MAIN] Sleeping {wait:.0f}s before next poll... (Ctrl+C to stop)\n")
+        time.sleep(wait)
+
+
+def run_daemon():
+    from daemon import Daemon
+
+    print("\n" + "=" * 60)
+    print("  DAEMON MODE: scrape, email and poll on their own schedules")
+    print("=" * 60 + "\n")
+
+    Daemon({
+        "scrape": (run_scrape_and_store, DAEMON_SCRAPE_INTERVAL_SECONDS),
+        "email":  (run_email_pending,    DAEMON_EMAIL_INTERVAL_SECONDS),
+        "poll":   (run_poll_once,        POLL_INTERVAL_SECONDS),
+    }).run()
 
 
 def main():
@@ -104,22 +130,23 @@ def main():
     print("\nAI CLIENT FINDER AGENT")
     print(f"    Mode: {mode}\n")
 
-    if mode == "scrape":
-        run_scrape_and_store()
-
-    elif mode == "email":
-        run_email_pending()
-
-    elif mode == "poll":
-        run_poll_loop()
-
-    elif mode == "full":
-        run_scrape_and_store()
-        run_email_pending()
-        run_poll_once()
+    modes = {
+        "scrape": [run_scrape_and_store],
+        "email":  [run_email_pending],
+        "poll":   [run_poll_loop],
+        "full":   [run_scrape_and_store, run_email_pending, run_poll_once],
+        "daemon": [run_daemon],
+    }
+    if mode not in modes:
+        print(f"Unknown mode: '{mode}'. Use: full | scrape | email | poll | daemon")
+        return
 
-    else:
-        print(f"Unknown mode: '{mode}'. Use: full | scrape | email | poll")
+    try:
+        for step in modes[mode]:
+            step()
+    finally:
+        path = metrics.write_reports(mode)
+        print(f"[MAIN] Run metrics written to {path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,224 @@
+"""
+metrics.py — Lightweight counters, latency histograms and LLM token totals
+for every outbound call (DuckDuckGo, DNS, Groq, SMTP, IMAP, Sheets).
+
+    with timed("sheets", "values.get"):
+        ...
+
+At the end of a run, write_reports() saves a JSON summary for the run and a
+Prometheus text file that node_exporter's textfile collector can scrape.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config import METRICS_DIR, METRICS_PROM_FILE
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SAMPLES_KEPT = 10_000   # raw durations kept per series for JSON percentiles
+
+
+class _Series:
+    def __init__(self):
+        self.count   = 0
+        self.errors  = 0
+        self.total   = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.samples = deque(maxlen=SAMPLES_KEPT)
+
+    def observe(self, seconds: float, error: bool):
+        self.count += 1
+        self.total += seconds
+        if error:
+            self.errors += 1
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        self.samples.append(seconds)
+
+
+class _TokenSeries:
+    """Prompt / completion tokens per LLM call for one operation (generate, classify, ...)."""
+
+    def __init__(self):
+        self.count      = 0
+        self.prompt     = 0
+        self.completion = 0
+        self.samples    = deque(maxlen=SAMPLES_KEPT)   # (prompt, completion) per call
+
+    def observe(self, prompt_tokens: int, completion_tokens: int):
+        self.count      += 1
+        self.prompt     += prompt_tokens
+        self.completion += completion_tokens
+        self.samples.append((prompt_tokens, completion_tokens))
+
+
+_lock    = threading.Lock()
+_series  = {}   # (service, op) -> _Series
+_tokens  = {}   # (model, kind) -> int
+_llm     = {}   # op -> _TokenSeries
+_started = time.time()
+
+
+def observe(service: str, op: str, seconds: float, error: bool = False):
+    with _lock:
+        series = _series.get((service, op))
+        if series is None:
+            series = _series[(service, op)] = _Series()
+        series.observe(seconds, error)
+
+
+@contextmanager
+def timed(service: str, op: str):
+    """Time the block as one call to `service`; an exception counts as an error."""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        observe(service, op, time.perf_counter() - start, error)
+
+
+def record_tokens(model: str, prompt_tokens: int, completion_tokens: int, op: str = ""):
+    prompt_tokens, completion_tokens = prompt_tokens or 0, completion_tokens or 0
+    with _lock:
+        _tokens[(model, "prompt")]     = _tokens.get((model, "prompt"), 0) + prompt_tokens
+        _tokens[(model, "completion")] = _tokens.get((model, "completion"), 0) + completion_tokens
+        if op:
+            series = _llm.get(op)
+            if series is None:
+                series = _llm[op] = _TokenSeries()
+            series.observe(prompt_tokens, completion_tokens)
+
+
+# ─────────────────────────────────────────────
+# Export
+# ─────────────────────────────────────────────
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+def summary() -> dict:
+    with _lock:
+        calls = {}
+        for (service, op), s in sorted(_series.items()):
+            samples = list(s.samples)
+            calls[f"{service}.{op}"] = {
+                "count":   s.count,
+                "errors":  s.errors,
+                "total_s": round(s.total, 4),
+                "p50_ms":  round(1000 * _percentile(samples, 0.50), 2),
+                "p95_ms":  round(1000 * _percentile(samples, 0.95), 2),
+                "p99_ms":  round(1000 * _percentile(samples, 0.99), 2),
+                "max_ms":  round(1000 * max(samples, default=0.0), 2),
+            }
+        tokens = {}
+        for (model, kind), n in sorted(_tokens.items()):
+            tokens.setdefault(model, {})[kind] = n
+        return {"started": _started, "calls": calls, "llm_tokens": tokens, "llm_calls": _llm_summary(calls)}
+
+
+def _llm_summary(calls: dict) -> dict:
+    """Per-operation tokens per call, next to that operation's Groq latency (caller holds _lock)."""
+    ops = {}
+    for op, t in sorted(_llm.items()):
+        prompts     = [p for p, _ in t.samples]
+        completions = [c for _, c in t.samples]
+        latency     = calls.get(f"groq.{op}", {})
+        ops[op] = {
+            "count":             t.count,
+            "prompt_tokens":     t.prompt,
+            "completion_tokens": t.completion,
+            "avg_prompt":        round(t.prompt / t.count, 1),
+            "avg_completion":    round(t.completion / t.count, 1),
+            "p95_prompt":        _percentile(prompts, 0.95),
+            "p95_completion":    _percentile(completions, 0.95),
+            "p50_ms":            latency.get("p50_ms", 0.0),
+            "p95_ms":            latency.get("p95_ms", 0.0),
+        }
+    return ops
+
+
+def llm_summary() -> dict:
+    """op -> tokens and latency per LLM call so far (see summary()["llm_calls"])."""
+    return summary()["llm_calls"]
+
+
+def prometheus_text() -> str:
+    lines = [
+        "# HELP agent_calls_total Outbound calls made by the agent.",
+        "# TYPE agent_calls_total counter",
+    ]
+    with _lock:
+        items = sorted(_series.items())
+        for (service, op), s in items:
+            lines.append(f'agent_calls_total{{service="{service}",op="{op}"}} {s.count}')
+
+        lines += ["# HELP agent_call_errors_total Outbound calls that raised.",
+                  "# TYPE agent_call_errors_total counter"]
+        for (service, op), s in items:
+            lines.append(f'agent_call_errors_total{{service="{service}",op="{op}"}} {s.errors}')
+
+        lines += ["# HELP agent_call_duration_seconds Outbound call latency.",
+                  "# TYPE agent_call_duration_seconds histogram"]
+        for (service, op), s in items:
+            labels = f'service="{service}",op="{op}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS, s.buckets):
+                cumulative += n
+                lines.append(f'agent_call_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'agent_call_duration_seconds_bucket{{{labels},le="+Inf"}} {s.count}')
+            lines.append(f"agent_call_duration_seconds_sum{{{labels}}} {s.total:.6f}")
+            lines.append(f"agent_call_duration_seconds_count{{{labels}}} {s.count}")
+
+        lines += ["# HELP agent_llm_tokens_total LLM tokens used, by model and kind.",
+                  "# TYPE agent_llm_tokens_total counter"]
+        for (model, kind), n in sorted(_tokens.items()):
+            lines.append(f'agent_llm_tokens_total{{model="{model}",kind="{kind}"}} {n}')
+
+        lines += ["# HELP agent_llm_op_tokens_total LLM tokens used, by operation and kind.",
+                  "# TYPE agent_llm_op_tokens_total counter"]
+        for op, t in sorted(_llm.items()):
+            lines.append(f'agent_llm_op_tokens_total{{op="{op}",kind="prompt"}} {t.prompt}')
+            lines.append(f'agent_llm_op_tokens_total{{op="{op}",kind="completion"}} {t.completion}')
+
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path: str, text: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)   # node_exporter must never see a half-written file
+
+
+def write_prometheus():
+    _write_atomic(METRICS_PROM_FILE, prometheus_text())
+
+
+def write_reports(mode: str) -> str:
+    """Write this run's JSON summary and refresh the Prometheus file. Returns the JSON path."""
+    report = summary()
+    report["mode"]       = mode
+    report["finished"]   = time.time()
+    report["duration_s"] = round(report["finished"] - report["started"], 3)
+
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(report["started"]))
+    path  = os.path.join(METRICS_DIR, f"run-{stamp}-{mode}.json")
+    _write_atomic(path, json.dumps(report, indent=2))
+    write_prometheus()
+    return path
@@ -0,0 +1,89 @@
+"""
+resolver.py — Concurrent DNS checks for "does this business have its own site?".
+Lookups run on a small thread pool with a per-lookup timeout (counted from when
+the lookup actually starts, not from when it was queued), and answers are
+kept in a disk cache so domains we've already checked are never resolved again
+until their TTL runs out.
+"""
+
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config import (DNS_MAX_WORKERS, DNS_TIMEOUT_SECONDS,
+                    DNS_POSITIVE_TTL_SECONDS, DNS_NEGATIVE_TTL_SECONDS)
+from disk_cache import TTLCache, MISSING
+import metrics
+
+
+_executor = ThreadPoolExecutor(max_workers=DNS_MAX_WORKERS, thread_name_prefix="dns")
+_cache    = TTLCache("dns_cache.json", DNS_POSITIVE_TTL_SECONDS)
+
+
+def _lookup(domain: str) -> bool:
+    try:
+        socket.getaddrinfo(domain, 80)
+        return True
+    except (OSError, UnicodeError):  # gaierror is an OSError
+        return False
+
+
+def _timed_lookup(domain: str) -> bool:
+    with metrics.timed("dns", "lookup"):
+        return _lookup(domain)
+
+
+def resolve_many(domains, timeout: float = DNS_TIMEOUT_SECONDS) -> dict[str, bool]:
+    """
+    Check which domains resolve. Returns {domain: resolves?}.
+    Cached answers are used as-is; the rest are looked up concurrently.
+    A lookup that doesn't answer within `timeout` counts as "doesn't resolve"
+    but isn't cached, so it gets another chance next cycle.
+    """
+    results = {}
+    todo = []
+    for domain in dict.fromkeys(d.lower() for d in domains if d):
+        cached = _cache.get(domain, MISSING)
+        if cached is MISSING:
+            todo.append(domain)
+        else:
+            results[domain] = cached
+
+    # The pool is shared with other scrape workers (and with lookups that timed
+    # out but are still stuck in getaddrinfo), so a lookup may sit in the
+    # queue for a while; its timeout only starts once it runs.
+    started = {}   # domain -> monotonic time its lookup began
+
+    def run(domain: str) -> bool:
+        started[domain] = time.monotonic()
+        return _timed_lookup(domain)
+
+    futures = {_executor.submit(run, d): d for d in todo}
+    pending = set(futures)
+    while pending:
+        deadlines = [started[futures[f]] + timeout for f in pending if futures[f] in started]
+        wait_for  = min(deadlines) - time.monotonic() if deadlines else timeout
+        done, pending = wait(pending, timeout=max(wait_for, 0.01), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            domain   = futures[future]
+            resolves = future.result()
+            results[domain] = resolves
+            _cache.set(domain, resolves,
+                       DNS_POSITIVE_TTL_SECONDS if resolves else DNS_NEGATIVE_TTL_SECONDS)
+
+        now = time.monotonic()
+        for future in [f for f in pending if futures[f] in started and now - started[futures[f]] >= timeout]:
+            pending.discard(future)
+            domain = futures[future]
+            print(f"  [DNS] Lookup timed out for {domain}")
+            results[domain] = False
+
+    if todo:
+        _cache.save()
+    return results
+
+
+def has_own_website(domain: str) -> bool:
+    """Quick DNS check — if the domain resolves, they probably have a site."""
+    return resolve_many([domain]).get(domain.lower(), False)
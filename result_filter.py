@@ -0,0 +1,84 @@
+"""
+result_filter.py — Decides which search hits are worth keeping, compiled once
+from SKIP_KEYWORDS / SKIP_DOMAINS:
+
+- keywords become one regex, factored by shared prefixes
+  ("b(?:est\\ in|log)|..."), run once over the lowercased title + snippet
+  instead of lowercasing and scanning both once per keyword;
+- domains go into a trie keyed on labels from the TLD down, so "facebook.com"
+  blocks m.facebook.com but not notfacebook.com or facebook.com.example.net.
+"""
+
+import re
+
+from config import SKIP_KEYWORDS, SKIP_DOMAINS
+
+
+HOST_RE = re.compile(r"https?://(?:[^/\s?#@]*@)?([^/\s?#:]+)", re.IGNORECASE)   # host, minus user@ and :port
+_END    = None   # marks "a blocked domain ends here" in the trie (labels are never None)
+
+
+def _prefix_pattern(words) -> str:
+    """
+    Regex source matching any of `words`, with shared prefixes factored out.
+    Python's re tries a plain "a|b|c" alternation branch by branch at every
+    position; the factored form rejects most positions on the first character.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[_END] = True
+
+    def emit(node) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items(), key=lambda t: t[0] or "")
+                    if ch is not _END]
+        if not branches:
+            return ""
+        if _END in node:   # a word ends here, and longer ones continue
+            return "(?:" + "|".join(branches) + ")?"
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+
+class ResultFilter:
+    def __init__(self, keywords=SKIP_KEYWORDS, domains=SKIP_DOMAINS):
+        words = {k.lower() for k in keywords if k}
+        self._keyword_re = re.compile(_prefix_pattern(words)) if words else None
+
+        self._trie = {}
+        for domain in domains:
+            node = self._trie
+            for label in reversed(domain.lower().strip(".").split(".")):
+                node = node.setdefault(label, {})
+            node[_END] = True
+
+    def is_noise(self, title: str, body: str) -> bool:
+        """True for news / wiki / listicle results that aren't a business."""
+        if self._keyword_re is None:
+            return False
+        # keywords never contain "\n", so no match can straddle the two fields
+        return self._keyword_re.search(f"{title}\n{body}".lower()) is not None
+
+    def is_blocked_domain(self, host: str) -> bool:
+        """True if `host` is one of the skip domains or a subdomain of one."""
+        node = self._trie
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if _END in node:
+                return True
+        return False
+
+    def extract_domain(self, url: str) -> str | None:
+        """The URL's host (no credentials/port), or None if there isn't one or it's a skip domain."""
+        match = HOST_RE.search(url)
+        if not match:
+            return None
+        host = match.group(1).rstrip(".").lower()
+        if not host or self.is_blocked_domain(host):
+            return None
+        return host
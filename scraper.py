@@ -3,24 +3,42 @@ scraper.py — Searches DuckDuckGo for local businesses in a niche+city combo,
 then filters to keep only those that likely DON'T have a website.
 """
 
-import random
-import re
-import time
-import socket
-from ddgs import DDGS
-from config import NICHES, CITIES, RESULTS_PER_QUERY, COMBOS_PER_CYCLE
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import (RESULTS_PER_QUERY, COMBOS_PER_CYCLE, SEARCH_RATE_PER_SECOND, SEARCH_BURST,
+                    SCRAPE_MAX_WORKERS, SEARCH_CACHE_TTL_SECONDS)
+from combo_scheduler import get_scheduler
+from disk_cache import cache_path, write_json_atomic, TTLCache, MISSING
+from enricher import enrich_businesses
+from ratelimit import TokenBucket
+from result_filter import ResultFilter
+from resolver import resolve_many
+import metrics
+
+
+def search_provider():
+    """The DDGS class, imported on first search so other modes don't pay for it."""
+    from ddgs import DDGS
+    return DDGS
+
+
+# One bucket for the whole process so concurrent queries share the budget
+search_limiter = TokenBucket(SEARCH_RATE_PER_SECOND, SEARCH_BURST)
+
+# Keyword / skip-domain rules from config, compiled once
+result_filter = ResultFilter()
+
+# Raw results per query string; a repeat query inside the TTL costs no search
+_search_cache = TTLCache("search_cache.json", SEARCH_CACHE_TTL_SECONDS)
 
 
 # ─────────────────────────────────────────────
-# Pick random niche + city combos
+# Pick niche + city combos
 # ─────────────────────────────────────────────
-def get_random_combos(n=COMBOS_PER_CYCLE):
-    combos = []
-    for _ in range(n):
-        niche = random.choice(NICHES)
-        city  = random.choice(CITIES)
-        combos.append((niche, city))
-    print(f"[SCRAPER] Selected {n} combos: {combos}")
+def pick_combos(n=COMBOS_PER_CYCLE):
+    combos = get_scheduler().pick(n)
+    print(f"[SCRAPER] Selected {len(combos)} combos: {combos}")
     return combos
 
 
@@ -28,56 +46,37 @@ def get_random_combos(n=COMBOS_PER_CYCLE):
 # Extract a domain from a snippet / URL if present
 # ─────────────────────────────────────────────
 def extract_domain(url: str) -> str | None:
-    """Pull the root domain out of a URL string."""
-    try:
-        match = re.search(r"https?://([^/\s]+)", url)
-        if match:
-            domain = match.group(1).lower()
-            # skip social media / directories — these aren't "their own" website
-            skip = ["facebook.com", "instagram.com", "twitter.com",
-                    "yelp.com", "google.com", "maps.google.com",
-                    "justdial.com", "sulekha.com", "indiamart.com",
-                    "urbanclap.com", "urban company", "linkedin.com"]
-            for s in skip:
-                if s in domain:
-                    return None
-            return domain
-    except Exception:
-        pass
-    return None
-
-
-def has_own_website(domain: str) -> bool:
-    """Quick DNS check — if the domain resolves, they probably have a site."""
-    try:
-        socket.setdefaulttimeout(3)
-        socket.getaddrinfo(domain, 80)
-        return True
-    except (socket.gaierror, socket.timeout):
-        return False
+    """Pull the domain out of a URL string; None for social media / directories."""
+    return result_filter.extract_domain(url)
 
 
 # ─────────────────────────────────────────────
 # Core scrape function
 # ─────────────────────────────────────────────
-def scrape_businesses(niche: str, city: str) -> list[dict]:
+def scrape_businesses(niche: str, city: str):
     """
     Search DuckDuckGo for businesses matching niche+city.
-    Return a list of dicts for businesses that appear to have NO website.
+    Yields a dict for each business that appears to have NO website.
     """
     query = f"{niche} in {city} contact"
     print(f"[SCRAPER] Searching: '{query}'")
 
-    results = []
-    try:
-        with DDGS() as ddgs:
-            hits = ddgs.text(query, max_results=RESULTS_PER_QUERY)
-            results = list(hits) if hits else []
-    except Exception as e:
-        print(f"[SCRAPER] Search error: {e}")
-        return []
-
-    businesses = []
+    results = _search_cache.get(query, MISSING)
+    if results is not MISSING:
+        print(f"[SCRAPER] Using cached results for '{query}'")
+    else:
+        search_limiter.acquire()  # be polite to DuckDuckGo
+        try:
+            with metrics.timed("ddgs", "search"), search_provider()() as ddgs:
+                hits = ddgs.text(query, max_results=RESULTS_PER_QUERY)
+                results = list(hits) if hits else []
+        except Exception as e:
+            print(f"[SCRAPER] Search error: {e}")
+            return
+        _search_cache.set(query, results)
+        _search_cache.save()
+
+    candidates = []
     seen_titles = set()
 
     for r in results:
@@ -86,24 +85,31 @@ def scrape_businesses(niche: str, city: str) -> list[dict]:
         url     = r.get("href", "").strip()
 
         # deduplicate
-        if title.lower() in seen_titles:
+        title_key = title.lower()
+        if title_key in seen_titles:
             continue
-        seen_titles.add(title.lower())
+        seen_titles.add(title_key)
 
         # skip obvious non-business results (news, wiki, etc.)
-        skip_keywords = ["wikipedia", "news", "article", "blog", "how to", "what is", "top 10", "best in"]
-        if any(kw in title.lower() or kw in body.lower() for kw in skip_keywords):
+        if result_filter.is_noise(title, body):
             continue
 
-        # Check if they have their own website
-        domain = extract_domain(url)
-        if domain and has_own_website(domain):
+        candidates.append((title, body, url, extract_domain(url)))
+
+    # Check every domain from this query in one concurrent batch
+    resolves = resolve_many(domain for _, _, _, domain in candidates if domain)
+
+    found = 0
+    for title, body, url, domain in candidates:
+        if domain and resolves.get(domain):
             # They already have a website → not our target
             print(f"  [SKIP] {title} — has website ({domain})")
             continue
 
         # This business likely has NO website — it's a candidate
-        businesses.append({
+        print(f"  [FOUND] {title} — no website detected")
+        found += 1
+        yield {
             "business_name": title,
             "niche":         niche,
             "city":          city,
@@ -113,25 +119,128 @@ def scrape_businesses(niche: str, city: str) -> list[dict]:
             "status":        "Pending",   # Pending → Contacted → Lead
             "email_sent":    "No",
             "notes":         "",
-        })
-        print(f"  [FOUND] {title} — no website detected")
+        }
 
-    print(f"[SCRAPER] Found {len(businesses)} candidate(s) for '{niche} in {city}'")
-    return businesses
+    print(f"[SCRAPER] Found {found} candidate(s) for '{niche} in {city}'")
+
+
+# ─────────────────────────────────────────────
+# Resumable cycle checkpoint
+# ─────────────────────────────────────────────
+CHECKPOINT_FILE = "scrape_checkpoint.json"
+
+
+class ScrapeCheckpoint:
+    """
+    Remembers which combos the current cycle covers and which of them have
+    been written to the sheet, so an interrupted cycle picks up where it left
+    off instead of starting over.
+
+    finish() only marks a combo in memory; save() (hooked to the sheet
+    writer's flush) is what makes it durable, so a combo never counts as
+    done before its rows are actually in the sheet.
+    """
+
+    def __init__(self, filename: str = CHECKPOINT_FILE):
+        self.path     = cache_path(filename)
+        self.combos   = []
+        self.done     = set()
+        self.finished = set()
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+            self.combos = [tuple(c) for c in state["combos"]]
+            self.done   = {tuple(c) for c in state["done"]}
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+    def remaining(self) -> list[tuple[str, str]]:
+        return [c for c in self.combos if c not in self.done]
+
+    def start(self, combos: list[tuple[str, str]]):
+        self.combos, self.done, self.finished = list(combos), set(), set()
+        self.save()
+
+    def finish(self, combo: tuple[str, str]):
+        self.finished.add(combo)
+
+    def save(self):
+        self.done |= self.finished
+        write_json_atomic(self.path, {"combos": self.combos, "done": sorted(self.done)})
+
+    def clear(self):
+        """The cycle is complete — the next one starts fresh."""
+        self.combos, self.done, self.finished = [], set(), set()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
 
 
 # ─────────────────────────────────────────────
 # Run full scrape cycle
 # ─────────────────────────────────────────────
-def run_scrape_cycle() -> list[dict]:
-    """Run scrapes for all random combos and return combined results."""
-    combos = get_random_combos()
-    all_businesses = []
-
-    for niche, city in combos:
-        businesses = scrape_businesses(niche, city)
-        all_businesses.extend(businesses)
-        time.sleep(2)  # be polite to DuckDuckGo
-
-    print(f"\n[SCRAPER] Total businesses collected this cycle: {len(all_businesses)}")
-    return all_businesses
\ No newline at end of file
+def _scrape_combo(niche: str, city: str, known_names=frozenset()) -> list[dict]:
+    businesses = list(scrape_businesses(niche, city))
+    # look up missing emails only for businesses that will actually be stored
+    enrich_businesses([b for b in businesses if b["business_name"].lower() not in known_names])
+    return businesses
+
+
+def run_scrape_cycle(checkpoint: ScrapeCheckpoint | None = None, known_names=frozenset(),
+                     max_workers: int = SCRAPE_MAX_WORKERS):
+    """
+    Run scrapes for the scheduled combos concurrently and yield each business
+    as soon as its combo finishes. At most `max_workers` queries are in
+    flight; the shared search_limiter decides how fast they hit DuckDuckGo.
+
+    With a checkpoint, an unfinished cycle is resumed (only its remaining
+    combos are scraped) and each combo is marked finished once every one of
+    its businesses has been handed to the caller.
+
+    Each finished combo reports to the scheduler how many of its businesses
+    were new, i.e. not in `known_names` (lowercased names already stored).
+    """
+    combos = checkpoint.remaining() if checkpoint else []
+    if combos:
+        print(f"[SCRAPER] Resuming interrupted cycle: {len(combos)} combo(s) left: {combos}")
+    else:
+        combos = pick_combos()
+        if checkpoint:
+            checkpoint.start(combos)
+
+    total = 0
+    seen_names = set()
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = {pool.submit(_scrape_combo, niche, city, known_names): (niche, city)
+                   for niche, city in combos}
+
+        # hand results on as each query finishes, not in submission order
+        for future in as_completed(futures):
+            niche, city = futures[future]
+            try:
+                businesses = future.result()
+            except Exception as e:
+                print(f"[SCRAPER] '{niche} in {city}' failed: {e}")
+                continue
+
+            new = 0
+            for b in businesses:
+                key = b["business_name"].lower()
+                if key in seen_names:
+                    continue
+                seen_names.add(key)
+                new += key not in known_names
+                total += 1
+                yield b
+
+            get_scheduler().record((niche, city), new)
+            if checkpoint:
+                checkpoint.finish((niche, city))
+    finally:
+        # the caller may stop early — don't start combos nobody will read
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    print(f"\n[SCRAPER] Total businesses collected this cycle: {total}")
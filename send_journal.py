@@ -0,0 +1,164 @@
+"""
+send_journal.py — Append-only record of what the email run has done to each
+row, so a crash between sending an email and writing the sheet never leads
+to a second generation or a second send.
+
+One JSON object per line in .cache/send_journal.jsonl:
+
+    generated   subject/body are ready (reused instead of calling the LLM again)
+    sending     about to hand the email to SMTP (fsynced first)
+    sent        SMTP accepted it, from `sender`
+    failed      SMTP rejected it
+    unsent      nothing went out (sender quota ran out); the row is free again
+    written     the sheet row has been updated — the row is done
+
+A row whose last event is sending / sent / failed still owes a sheet write;
+resume() in email_pipeline finishes those before any new work starts. A row
+left at "sending" may or may not have been delivered, so it is never sent
+again automatically.
+
+Only one process at a time may send: acquire() takes an exclusive lock on
+the journal that the OS releases if the process dies.
+"""
+
+import json
+import os
+import threading
+import time
+
+from disk_cache import cache_path
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
+
+
+JOURNAL_FILE = "send_journal.jsonl"
+CLAIMED      = ("sending", "sent", "failed")   # stages that still owe a sheet write
+
+
+class SendJournal:
+    def __init__(self, filename: str = JOURNAL_FILE):
+        self.path      = cache_path(filename)
+        self.rows      = {}     # row_index -> {"stage", "content", ...} for rows not yet written
+        self._lock     = threading.Lock()
+        self._file     = None
+        self._lockfile = None
+        self._replay()
+
+    def _replay(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue   # torn last line from a crash
+                    self._apply(event)
+        except FileNotFoundError:
+            pass
+
+    def _apply(self, event: dict):
+        row = event["row"]
+        if event["ev"] == "written":
+            self.rows.pop(row, None)
+            return
+        st = self.rows.setdefault(row, {})
+        if event["ev"] == "generated":
+            st["content"] = {"subject": event["subject"], "body": event["body"]}
+        else:
+            st.update({k: v for k, v in event.items() if k not in ("ev", "row", "t")})
+            st["stage"] = event["ev"]
+
+    # ── process lock ──
+    def acquire(self) -> bool:
+        """Take the single-sender lock. False if another process holds it."""
+        self._lockfile = open(f"{self.path}.lock", "a")
+        try:
+            if fcntl:
+                fcntl.flock(self._lockfile.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self._lockfile.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            self._lockfile.close()
+            self._lockfile = None
+            return False
+        # another process may have written since we last looked
+        with self._lock:
+            self.rows = {}
+            self._replay()
+        return True
+
+    def release(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+        if self._lockfile:
+            self._lockfile.close()   # closing the file drops the lock
+            self._lockfile = None
+
+    # ── events ──
+    def record(self, ev: str, row: int, sync: bool = False, **fields):
+        """Append one event. `sync` forces it to disk before returning."""
+        event = {"ev": ev, "row": row, "t": time.time(), **fields}
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+            self._apply(event)
+
+    def content(self, row: int) -> dict | None:
+        """The email generated earlier for this row, if any."""
+        with self._lock:
+            return self.rows.get(row, {}).get("content")
+
+    def claimed(self, row: int) -> bool:
+        """True if the row was (or may have been) sent and its sheet write is still outstanding."""
+        with self._lock:
+            return self.rows.get(row, {}).get("stage") in CLAIMED
+
+    def outstanding(self) -> dict:
+        """row_index -> state for every row that still owes a sheet write."""
+        with self._lock:
+            return {row: dict(st) for row, st in self.rows.items() if st.get("stage") in CLAIMED}
+
+    def compact(self, keep_rows=None):
+        """
+        Rewrite the journal with just the rows that aren't done. Unsent rows
+        holding only generated content are dropped unless they're in `keep_rows`.
+        """
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            self.rows = {row: st for row, st in self.rows.items()
+                         if st.get("stage") in CLAIMED or keep_rows is None or row in keep_rows}
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for row, st in self.rows.items():
+                    if "content" in st:
+                        f.write(json.dumps({"ev": "generated", "row": row, **st["content"]},
+                                           ensure_ascii=False) + "\n")
+                    if "stage" in st:
+                        fields = {k: v for k, v in st.items() if k not in ("stage", "content")}
+                        f.write(json.dumps({"ev": st["stage"], "row": row, **fields},
+                                           ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> SendJournal:
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = SendJournal()
+        return _journal
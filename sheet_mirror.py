@@ -0,0 +1,255 @@
+"""
+sheet_mirror.py — Local SQLite copy of the "All Businesses" tab.
+
+The read helpers in sheets.py query this mirror instead of downloading the
+whole sheet every time. A sync costs one small request for the key columns
+(name, status, email) plus a full-row fetch only for rows whose keys changed
+or that are new. Our own writes are applied to the mirror as they happen, so
+it stays current between syncs.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from config import GOOGLE_SHEET_ID, SHEET_ALL_BUSINESSES, MIRROR_SYNC_SECONDS
+from disk_cache import cache_path
+import metrics
+
+
+# Column order of the "All Businesses" tab (A → K)
+FIELDS = [
+    "business_name",
+    "niche",
+    "city",
+    "source_url",
+    "snippet",
+    "has_website",
+    "status",
+    "email_sent",
+    "email_address",
+    "notes",
+    "sender",
+]
+
+STATUS_COL = FIELDS.index("status")          # G
+EMAIL_COL  = FIELDS.index("email_address")   # I
+SENDER_COL = FIELDS.index("sender")          # K
+RANGES_PER_REQUEST = 100
+
+# The googleapiclient service (one httplib2 connection) isn't thread-safe and
+# daemon mode runs stages on threads that share it, so every request is made
+# inside sheets_call(). Only the HTTP round trip holds the lock.
+_api_lock = threading.Lock()
+
+
+@contextmanager
+def sheets_call(op: str):
+    with _api_lock, metrics.timed("sheets", op):
+        yield
+
+
+def _pad(row: list) -> list:
+    return (list(row) + [""] * len(FIELDS))[:len(FIELDS)]
+
+
+def _key(name: str, status: str, email_sent: str, email_address: str) -> str:
+    return "\x1f".join((name, status, email_sent, email_address))
+
+
+def _runs(indexes: list[int]) -> list[tuple[int, int]]:
+    """Collapse sorted row numbers into (first, last) runs of consecutive rows."""
+    runs = []
+    for i in indexes:
+        if runs and runs[-1][1] == i - 1:
+            runs[-1] = (runs[-1][0], i)
+        else:
+            runs.append((i, i))
+    return runs
+
+
+class SheetMirror:
+    def __init__(self, path: str | None = None, sync_interval: float = MIRROR_SYNC_SECONDS):
+        self.sync_interval = sync_interval
+        self._last_sync    = 0.0
+        self._lock         = threading.RLock()
+        self._db           = sqlite3.connect(path or cache_path("sheet_mirror.sqlite3"),
+                                             check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def _create_schema(self):
+        cols = ", ".join(f"{f} TEXT NOT NULL DEFAULT ''" for f in FIELDS)
+        with self._db:
+            # columns changed since this file was written — it's only a cache, rebuild it
+            existing = [r[1] for r in self._db.execute("PRAGMA table_info(businesses)")]
+            if existing and existing[1:1 + len(FIELDS)] != FIELDS:
+                self._db.execute("DROP TABLE businesses")
+            self._db.execute(f"""
+                CREATE TABLE IF NOT EXISTS businesses (
+                    row_index  INTEGER PRIMARY KEY,
+                    {cols},
+                    name_key   TEXT NOT NULL DEFAULT '',
+                    status_key TEXT NOT NULL DEFAULT '',
+                    email_key  TEXT NOT NULL DEFAULT '',
+                    sync_key   TEXT NOT NULL DEFAULT ''
+                )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_status ON businesses(status_key)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_name   ON businesses(name_key)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_email  ON businesses(email_key)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+            # a mirror of some other spreadsheet is useless — start over
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'sheet_id'").fetchone()
+            if row is None or row[0] != GOOGLE_SHEET_ID:
+                self._db.execute("DELETE FROM businesses")
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('sheet_id', ?)", (GOOGLE_SHEET_ID,))
+
+    # ─────────────────────────────────────────
+    # Writes
+    # ─────────────────────────────────────────
+    def _upsert(self, row_index: int, row: list):
+        row = _pad(row)
+        if not any(cell.strip() for cell in row):
+            self._db.execute("DELETE FROM businesses WHERE row_index = ?", (row_index,))
+            return
+        name, status, email_sent, email_address = row[0], row[STATUS_COL], row[STATUS_COL + 1], row[EMAIL_COL]
+        self._db.execute(
+            f"INSERT OR REPLACE INTO businesses (row_index, {', '.join(FIELDS)}, "
+            f"name_key, status_key, email_key, sync_key) "
+            f"VALUES ({', '.join('?' * (len(FIELDS) + 5))})",
+            (row_index, *row,
+             name.strip().lower(), status.strip().lower(), email_address.strip().lower(),
+             _key(name, status, email_sent, email_address)),
+        )
+
+    def apply_append(self, start_row: int, rows: list[list]):
+        """Record rows we just appended to the sheet, starting at `start_row`."""
+        with self._lock, self._db:
+            for offset, row in enumerate(rows):
+                self._upsert(start_row + offset, row)
+
+    def apply_update(self, row_index: int, status: str, email_sent: str, email_address: str, notes: str,
+                     sender: str | None = None):
+        """Record a G:J (or G:K, with a sender) update we just made to the sheet."""
+        with self._lock, self._db:
+            existing = self._db.execute("SELECT * FROM businesses WHERE row_index = ?", (row_index,)).fetchone()
+            row = [existing[f] for f in FIELDS] if existing else [""] * len(FIELDS)
+            row[STATUS_COL:STATUS_COL + 4] = [status, email_sent, email_address, notes]
+            if sender is not None:
+                row[SENDER_COL] = sender
+            self._upsert(row_index, row)
+
+    # ─────────────────────────────────────────
+    # Sync
+    # ─────────────────────────────────────────
+    def sync(self, service, force: bool = False):
+        """
+        Bring the mirror up to date with the sheet. Skipped if we synced less
+        than `sync_interval` seconds ago, unless `force` is set.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._last_sync < self.sync_interval:
+                return
+
+            tab = f"'{SHEET_ALL_BUSINESSES}'"
+            with sheets_call("values.batchGet"):
+                result = service.spreadsheets().values().batchGet(
+                    spreadsheetId=GOOGLE_SHEET_ID,
+                    ranges=[f"{tab}!A2:A", f"{tab}!G2:I"],
+                ).execute()
+            names, keys = (vr.get("values", []) for vr in result.get("valueRanges", [{}, {}]))
+            last_row = max(len(names), len(keys)) + 1
+
+            known = {r["row_index"]: r["sync_key"]
+                     for r in self._db.execute("SELECT row_index, sync_key FROM businesses")}
+
+            changed = []
+            for i in range(max(len(names), len(keys))):
+                name = names[i][0] if i < len(names) and names[i] else ""
+                g_i  = (list(keys[i]) if i < len(keys) else []) + ["", "", ""]
+                key  = _key(name, *g_i[:3])
+                row_index = i + 2
+                if not name and not any(g_i):
+                    if row_index in known:
+                        changed.append(row_index)   # row was cleared
+                elif known.get(row_index) != key:
+                    changed.append(row_index)
+
+            fetched = self._fetch_rows(service, changed)
+
+            with self._db:
+                self._db.execute("DELETE FROM businesses WHERE row_index > ?", (last_row,))
+                for row_index in changed:
+                    self._upsert(row_index, fetched.get(row_index, []))
+
+            self._last_sync = time.monotonic()
+            print(f"[MIRROR] Synced: {last_row - 1} row(s) in sheet, {len(changed)} changed.")
+
+    def _fetch_rows(self, service, row_indexes: list[int]) -> dict[int, list]:
+        """Download full A:K rows for the given row numbers, coalesced into ranges."""
+        rows = {}
+        runs = _runs(sorted(row_indexes))
+        for i in range(0, len(runs), RANGES_PER_REQUEST):
+            chunk = runs[i:i + RANGES_PER_REQUEST]
+            with sheets_call("values.batchGet"):
+                result = service.spreadsheets().values().batchGet(
+                    spreadsheetId=GOOGLE_SHEET_ID,
+                    ranges=[f"'{SHEET_ALL_BUSINESSES}'!A{first}:K{last}" for first, last in chunk],
+                ).execute()
+            for (first, _), vr in zip(chunk, result.get("valueRanges", [])):
+                for offset, row in enumerate(vr.get("values", [])):
+                    rows[first + offset] = row
+        return rows
+
+    # ─────────────────────────────────────────
+    # Queries
+    # ─────────────────────────────────────────
+    def _to_dict(self, r: sqlite3.Row) -> dict:
+        d = {"row_index": r["row_index"]}
+        d.update({f: r[f] for f in FIELDS})
+        return d
+
+    def names(self) -> set[str]:
+        with self._lock:
+            return {r[0] for r in self._db.execute("SELECT name_key FROM businesses") if r[0]}
+
+    def by_status(self, status: str) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM businesses WHERE status_key = ? ORDER BY row_index",
+                (status.strip().lower(),))
+            return [self._to_dict(r) for r in rows]
+
+    def by_name(self, name: str) -> dict | None:
+        with self._lock:
+            r = self._db.execute("SELECT * FROM businesses WHERE name_key = ? ORDER BY row_index LIMIT 1",
+                                 (name.strip().lower(),)).fetchone()
+            return self._to_dict(r) if r else None
+
+    def by_email(self, email_address: str) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM businesses WHERE email_key = ? ORDER BY row_index",
+                                    (email_address.strip().lower(),))
+            return [self._to_dict(r) for r in rows]
+
+
+_mirror = None
+_mirror_lock = threading.Lock()
+
+
+def get_mirror() -> SheetMirror:
+    """The process-wide mirror (opened on first use)."""
+    global _mirror
+    with _mirror_lock:
+        if _mirror is None:
+            _mirror = SheetMirror()
+        return _mirror
+
+
+def parse_start_row(updated_range: str) -> int | None:
+    """Pull the first row number out of an A1 range like "'All Businesses'!A12:K14"."""
+    match = re.search(r"![A-Z]+(\d+)", updated_range or "")
+    return int(match.group(1)) if match else None
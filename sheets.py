@@ -4,12 +4,18 @@ import os
 # It tells oauthlib to allow http:// redirects (localhost is not https).
 os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
 
+import atexit
+import datetime
 import json
+import threading
+import time
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from config import GOOGLE_CREDENTIALS_FILE, GOOGLE_SHEET_ID, SHEET_ALL_BUSINESSES, SHEET_LEADS
+from googleapiclient.errors import HttpError
+from config import (GOOGLE_CREDENTIALS_FILE, GOOGLE_SHEET_ID, SHEET_ALL_BUSINESSES, SHEET_LEADS,
+                    SHEET_FLUSH_ROWS, SHEET_FLUSH_SECONDS, SHEETS_TOKEN_REFRESH_MARGIN_SECONDS)
+from sheet_mirror import get_mirror, parse_start_row, sheets_call
+import metrics
 
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
@@ -19,7 +25,12 @@ SCOPES = [
 TOKEN_FILE = "token.json"
 
 
-def get_sheets_service():
+def _save_token(creds):
+    with open(TOKEN_FILE, "w") as f:
+        f.write(creds.to_json())
+
+
+def _load_credentials():
     creds = None
     try:
         with open(TOKEN_FILE, "r") as f:
@@ -29,8 +40,10 @@ def get_sheets_service():
 
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
+            with metrics.timed("oauth", "refresh"):
+                creds.refresh(Request())
         else:
+            from google_auth_oauthlib.flow import InstalledAppFlow  # only needed for first-time login
             flow = InstalledAppFlow.from_client_secrets_file(GOOGLE_CREDENTIALS_FILE, SCOPES)
             try:
                 # Use localhost to allow the OS to resolve to IPv4 or IPv6 as needed by the browser
@@ -49,12 +62,53 @@ def get_sheets_service():
                 else:
                     raise
 
-        with open(TOKEN_FILE, "w") as f:
-            f.write(creds.to_json())
+        _save_token(creds)
+
+    return creds
+
+
+def _refresh_forever(creds):
+    """Background thread: refresh the access token shortly before it expires."""
+    while True:
+        delay = 60.0
+        if creds.expiry:
+            now   = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            delay = (creds.expiry - now).total_seconds() - SHEETS_TOKEN_REFRESH_MARGIN_SECONDS
+        if delay > 0:
+            time.sleep(delay)
+            continue
+        try:
+            with metrics.timed("oauth", "refresh"):
+                creds.refresh(Request())
+            _save_token(creds)
+        except Exception as e:
+            print(f"[SHEETS] Background token refresh failed: {e}")
+            time.sleep(60)
+
+
+_service = None
+_service_lock = threading.Lock()
 
-    service = build("sheets", "v4", credentials=creds)
-    print("[SHEETS] Authenticated successfully.")
-    return service
+
+def get_sheets_service():
+    """
+    Return the process-wide Sheets service, building it on first use.
+    The API description comes from the discovery document bundled with
+    google-api-python-client, so building never touches the network, and a
+    daemon thread keeps the OAuth token fresh for long-running modes.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            from googleapiclient.discovery import build
+            creds = _load_credentials()
+            _service = build("sheets", "v4", credentials=creds,
+                             static_discovery=True, cache_discovery=False)
+            if creds.refresh_token:
+                threading.Thread(target=_refresh_forever, args=(creds,),
+                                 name="sheets-token-refresh", daemon=True).start()
+            print("[SHEETS] Authenticated successfully.")
+        return _service
 
 
 HEADERS = [
@@ -68,15 +122,51 @@ HEADERS = [
     "Email Sent",
     "Email Address",
     "Notes",
+    "Sender Account",
 ]
+LAST_COL = chr(ord("A") + len(HEADERS) - 1)   # K
+
+
+# Tab names and "headers already written" are remembered for the whole
+# process, so steady-state writes don't re-check them on every call.
+_known_tabs   = None
+_headers_ok   = set()
+_tabs_lock    = threading.RLock()
+
+
+def invalidate_sheet_cache(sheet_name: str | None = None):
+    """Forget cached tab/header state (for one tab, or everything)."""
+    global _known_tabs
+    with _tabs_lock:
+        if sheet_name is None:
+            _known_tabs = None
+            _headers_ok.clear()
+        else:
+            if _known_tabs is not None:
+                _known_tabs.discard(sheet_name)
+            _headers_ok.discard(sheet_name)
+
+
+def _fetch_tab_names(service) -> set[str]:
+    with sheets_call("get"):
+        metadata = service.spreadsheets().get(
+            spreadsheetId=GOOGLE_SHEET_ID,
+            fields="sheets.properties.title"
+        ).execute()
+    return {s['properties']['title'] for s in metadata.get("sheets", [])}
 
 
 def ensure_sheet_exists(service, sheet_name: str):
-    metadata = service.spreadsheets().get(spreadsheetId=GOOGLE_SHEET_ID).execute()
-    sheets = metadata.get("sheets", [])
-    existing_titles = [s['properties']['title'] for s in sheets]
+    global _known_tabs
+    with _tabs_lock:
+        if _known_tabs is not None and sheet_name in _known_tabs:
+            return
+
+        # first use, or the tab isn't in our (possibly stale) list — ask the API
+        _known_tabs = _fetch_tab_names(service)
+        if sheet_name in _known_tabs:
+            return
 
-    if sheet_name not in existing_titles:
         print(f"[SHEETS] Creating missing tab: '{sheet_name}'")
         body = {
             "requests": [{
@@ -85,30 +175,90 @@ def ensure_sheet_exists(service, sheet_name: str):
                 }
             }]
         }
-        service.spreadsheets().batchUpdate(
-            spreadsheetId=GOOGLE_SHEET_ID,
-            body=body
-        ).execute()
+        with sheets_call("batchUpdate"):
+            service.spreadsheets().batchUpdate(
+                spreadsheetId=GOOGLE_SHEET_ID,
+                body=body
+            ).execute()
+        _known_tabs.add(sheet_name)
 
 
 def ensure_headers(service, sheet_name: str):
-    ensure_sheet_exists(service, sheet_name)
-
-    sheet_quoted = f"'{sheet_name}'" if " " in sheet_name else sheet_name
-    
-    result = service.spreadsheets().values().get(
-        spreadsheetId=GOOGLE_SHEET_ID,
-        range=f"{sheet_quoted}!A1:A1"
-    ).execute()
+    with _tabs_lock:
+        if sheet_name in _headers_ok:
+            return
+
+        ensure_sheet_exists(service, sheet_name)
+
+        sheet_quoted = f"'{sheet_name}'" if " " in sheet_name else sheet_name
+
+        with sheets_call("values.get"):
+            result = service.spreadsheets().values().get(
+                spreadsheetId=GOOGLE_SHEET_ID,
+                range=f"{sheet_quoted}!A1:{LAST_COL}1"
+            ).execute()
+
+        # empty, or written before newer columns were added
+        current = (result.get("values") or [[]])[0]
+        if len(current) < len(HEADERS) and current == HEADERS[:len(current)]:
+            with sheets_call("values.update"):
+                service.spreadsheets().values().update(
+                    spreadsheetId=GOOGLE_SHEET_ID,
+                    range=f"{sheet_quoted}!A1",
+                    valueInputOption="RAW",
+                    body={"values": [HEADERS]}
+                ).execute()
+            print(f"[SHEETS] Headers written to '{sheet_name}'")
+
+        _headers_ok.add(sheet_name)
+
+
+def _is_missing_tab(error: HttpError) -> bool:
+    return error.resp.status == 400 and "Unable to parse range" in str(error)
+
+
+def append_rows(service, sheet_name: str, rows: list[list]) -> dict:
+    """
+    Append rows to a tab with headers guaranteed. Costs one API call once the
+    tab is known; if the tab turns out to be gone, the cache is dropped and
+    the tab + headers are recreated before retrying once.
+    """
+    ensure_headers(service, sheet_name)
+
+    def do_append():
+        with sheets_call("values.append"):
+            return service.spreadsheets().values().append(
+                spreadsheetId=GOOGLE_SHEET_ID,
+                range=f"'{sheet_name}'!A:{LAST_COL}",
+                valueInputOption="RAW",
+                body={"values": rows}
+            ).execute()
 
-    if not result.get("values"):
-        service.spreadsheets().values().update(
-            spreadsheetId=GOOGLE_SHEET_ID,
-            range=f"{sheet_quoted}!A1",
-            valueInputOption="RAW",
-            body={"values": [HEADERS]}
-        ).execute()
-        print(f"[SHEETS] Headers written to '{sheet_name}'")
+    try:
+        return do_append()
+    except HttpError as e:
+        if not _is_missing_tab(e):
+            raise
+        print(f"[SHEETS] Tab '{sheet_name}' disappeared. Recreating it.")
+        invalidate_sheet_cache(sheet_name)
+        ensure_headers(service, sheet_name)
+        return do_append()
+
+
+def _business_row(b: dict) -> list:
+    return [
+        b.get("business_name", ""),
+        b.get("niche", ""),
+        b.get("city", ""),
+        b.get("source_url", ""),
+        b.get("snippet", ""),
+        b.get("has_website", "No"),
+        b.get("status", "Pending"),
+        b.get("email_sent", "No"),
+        b.get("email_address", ""),
+        b.get("notes", ""),
+        b.get("sender", ""),
+    ]
 
 
 def write_businesses(service, businesses: list[dict]):
@@ -124,80 +274,55 @@ def write_businesses(service, businesses: list[dict]):
         if b["business_name"].lower() in existing:
             print(f"  [SKIP] '{b['business_name']}' already in sheet")
             continue
-
-        row = [
-            b.get("business_name", ""),
-            b.get("niche", ""),
-            b.get("city", ""),
-            b.get("source_url", ""),
-            b.get("snippet", ""),
-            b.get("has_website", "No"),
-            b.get("status", "Pending"),
-            b.get("email_sent", "No"),
-            b.get("email_address", ""),
-            b.get("notes", ""),
-        ]
-        rows_to_add.append(row)
+        rows_to_add.append(_business_row(b))
 
     if rows_to_add:
-        service.spreadsheets().values().append(
-            spreadsheetId=GOOGLE_SHEET_ID,
-            range=f"'{SHEET_ALL_BUSINESSES}'!A:J",
-            valueInputOption="RAW",
-            body={"values": rows_to_add}
-        ).execute()
+        result = append_rows(service, SHEET_ALL_BUSINESSES, rows_to_add)
+        start_row = parse_start_row(result.get("updates", {}).get("updatedRange", ""))
+        if start_row:
+            get_mirror().apply_append(start_row, rows_to_add)
         print(f"[SHEETS] Added {len(rows_to_add)} new business(es).")
     else:
         print("[SHEETS] All businesses already exist. Nothing added.")
 
 
 def get_all_business_names(service) -> set[str]:
-    result = service.spreadsheets().values().get(
-        spreadsheetId=GOOGLE_SHEET_ID,
-        range=f"'{SHEET_ALL_BUSINESSES}'!A2:A1000"
-    ).execute()
-    values = result.get("values", [])
-    return {row[0].lower() for row in values if row}
+    ensure_headers(service, SHEET_ALL_BUSINESSES)   # the sync below needs the tab to exist
+    mirror = get_mirror()
+    mirror.sync(service)
+    return mirror.names()
 
 
 def get_pending_businesses(service) -> list[dict]:
-    result = service.spreadsheets().values().get(
-        spreadsheetId=GOOGLE_SHEET_ID,
-        range=f"'{SHEET_ALL_BUSINESSES}'!A2:J1000"
-    ).execute()
-
-    rows = result.get("values", [])
-    pending = []
-    for i, row in enumerate(rows):
-        row += [""] * (10 - len(row))
-        if row[6].strip().lower() == "pending":
-            pending.append({
-                "row_index": i + 2,
-                "business_name": row[0],
-                "niche":         row[1],
-                "city":          row[2],
-                "source_url":    row[3],
-                "snippet":       row[4],
-                "status":        row[6],
-            })
+    mirror = get_mirror()
+    mirror.sync(service)
+    pending = mirror.by_status("pending")
     print(f"[SHEETS] Found {len(pending)} pending business(es).")
     return pending
 
 
-def update_row(service, row_index: int, status: str, email_sent: str, email_address: str = "", notes: str = ""):
-    service.spreadsheets().values().update(
-        spreadsheetId=GOOGLE_SHEET_ID,
-        range=f"'{SHEET_ALL_BUSINESSES}'!G{row_index}:J{row_index}",
-        valueInputOption="RAW",
-        body={"values": [[status, email_sent, email_address, notes]]}
-    ).execute()
-    print(f"[SHEETS] Row {row_index} updated -> Status: {status}")
+def _update_range(row_index: int, values: list) -> str:
+    """G:J for status/email/notes, G:K when the sender account is included too."""
+    last = "K" if len(values) > 4 else "J"
+    return f"'{SHEET_ALL_BUSINESSES}'!G{row_index}:{last}{row_index}"
 
 
-def add_lead(service, business: dict):
-    ensure_headers(service, SHEET_LEADS)
+def update_row(service, row_index: int, status: str, email_sent: str, email_address: str = "", notes: str = "",
+               sender: str | None = None):
+    values = [status, email_sent, email_address, notes] + ([sender] if sender is not None else [])
+    with sheets_call("values.update"):
+        service.spreadsheets().values().update(
+            spreadsheetId=GOOGLE_SHEET_ID,
+            range=_update_range(row_index, values),
+            valueInputOption="RAW",
+            body={"values": [values]}
+        ).execute()
+    get_mirror().apply_update(row_index, *values)
+    print(f"[SHEETS] Row {row_index} updated -> Status: {status}")
+
 
-    row = [
+def _lead_row(business: dict) -> list:
+    return [
         business.get("business_name", ""),
         business.get("niche", ""),
         business.get("city", ""),
@@ -208,36 +333,170 @@ def add_lead(service, business: dict):
         business.get("email_sent", "Yes"),
         business.get("email_address", ""),
         business.get("notes", ""),
+        business.get("sender", ""),
     ]
 
-    service.spreadsheets().values().append(
-        spreadsheetId=GOOGLE_SHEET_ID,
-        range=f"'{SHEET_LEADS}'!A:J",
-        valueInputOption="RAW",
-        body={"values": [row]}
-    ).execute()
+
+def add_lead(service, business: dict):
+    append_rows(service, SHEET_LEADS, [_lead_row(business)])
     print(f"[SHEETS] Lead added: {business.get('business_name')}")
 
 
+# ─────────────────────────────────────────────
+# Write-behind buffer
+# ─────────────────────────────────────────────
+class SheetWriteError(RuntimeError):
+    """A SheetWriter's final flush failed; its writes are still queued for the exit retry."""
+
+
+class SheetWriter:
+    """
+    Collects new businesses, row updates and Leads appends in memory and
+    writes them in bulk: one values().append for new businesses (skipping
+    names already in the sheet), one values().batchUpdate for all row updates
+    and one values().append for all leads. A flush happens once `max_rows` writes are buffered, when a new
+    write arrives after `max_delay` seconds, on leaving the `with` block
+    (including Ctrl+C / exceptions) and at interpreter exit.
+
+    Flushes only ever run on the caller's thread — the googleapiclient service
+    object is not thread-safe, so there is no background timer. `on_flush` is
+    called after every successful flush (e.g. to checkpoint progress).
+
+    If the flush on leaving the `with` block fails, the writes stay queued for
+    the retry at interpreter exit and SheetWriteError is raised (unless the
+    block is already exiting with an exception), so callers never carry on as
+    if they were saved.
+    """
+
+    def __init__(self, service, max_rows: int = SHEET_FLUSH_ROWS, max_delay: float = SHEET_FLUSH_SECONDS,
+                 on_flush=None):
+        self.service     = service
+        self.max_rows    = max_rows
+        self.max_delay   = max_delay
+        self.on_flush    = on_flush
+        self._businesses = []
+        self._updates    = {}     # row_index -> [status, email_sent, email_address, notes]
+        self._leads      = []
+        self._names      = None   # lowercased names already in All Businesses
+        self._oldest     = None   # monotonic time of the oldest buffered write
+        self._lock       = threading.RLock()
+        atexit.register(self.flush)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *_):
+        if exc_type is None:
+            self.close()
+        elif self.flush():   # don't mask the exception already on its way out
+            atexit.unregister(self.flush)
+
+    def __len__(self):
+        return len(self._businesses) + len(self._updates) + len(self._leads)
+
+    def add_business(self, business: dict):
+        with self._lock:
+            self._businesses.append(_business_row(business))
+            self._buffered()
+
+    def update_row(self, row_index: int, status: str, email_sent: str, email_address: str = "", notes: str = "",
+                   sender: str | None = None):
+        with self._lock:
+            # a later update to the same row replaces the earlier one
+            self._updates[row_index] = [status, email_sent, email_address, notes] + \
+                                       ([sender] if sender is not None else [])
+            self._buffered()
+
+    def add_lead(self, business: dict):
+        with self._lock:
+            self._leads.append(_lead_row(business))
+            self._buffered()
+
+    def _buffered(self):
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if len(self) >= self.max_rows or time.monotonic() - self._oldest >= self.max_delay:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Write everything buffered. On failure the writes stay queued for the next flush."""
+        with self._lock:
+            businesses, updates, leads = self._businesses, self._updates, self._leads
+            if not businesses and not updates and not leads:
+                return True
+            self._businesses, self._updates, self._leads, self._oldest = [], {}, [], None
+
+            try:
+                if businesses:
+                    self._append_businesses(businesses)
+                    businesses = []
+
+                if updates:
+                    data = [{
+                        "range":  _update_range(row_index, values),
+                        "values": [values],
+                    } for row_index, values in updates.items()]
+                    with sheets_call("values.batchUpdate"):
+                        self.service.spreadsheets().values().batchUpdate(
+                            spreadsheetId=GOOGLE_SHEET_ID,
+                            body={"valueInputOption": "RAW", "data": data}
+                        ).execute()
+                    mirror = get_mirror()
+                    for row_index, values in updates.items():
+                        mirror.apply_update(row_index, *values)
+                    print(f"[SHEETS] Flushed {len(updates)} row update(s).")
+                    updates = {}
+
+                if leads:
+                    append_rows(self.service, SHEET_LEADS, leads)
+                    print(f"[SHEETS] Flushed {len(leads)} lead(s).")
+                    leads = []
+
+            except Exception as e:
+                print(f"[SHEETS] Flush failed ({len(businesses)} business(es), {len(updates)} update(s), "
+                      f"{len(leads)} lead(s) kept): {e}")
+                # put them back in front of anything buffered since
+                self._businesses = businesses + self._businesses
+                self._updates    = {**updates, **self._updates}
+                self._leads      = leads + self._leads
+                self._oldest     = time.monotonic()
+                return False
+
+            if self.on_flush:
+                self.on_flush()
+            return True
+
+    def _append_businesses(self, rows: list[list]):
+        if self._names is None:
+            self._names = get_all_business_names(self.service)
+
+        fresh, keys = [], set()
+        for row in rows:
+            key = row[0].lower()
+            if key in self._names or key in keys:
+                print(f"  [SKIP] '{row[0]}' already in sheet")
+                continue
+            keys.add(key)
+            fresh.append(row)
+        if not fresh:
+            return
+
+        result = append_rows(self.service, SHEET_ALL_BUSINESSES, fresh)
+        start_row = parse_start_row(result.get("updates", {}).get("updatedRange", ""))
+        if start_row:
+            get_mirror().apply_append(start_row, fresh)
+        self._names |= keys
+        print(f"[SHEETS] Flushed {len(fresh)} new business(es).")
+
+    def close(self):
+        """Final flush. Raises SheetWriteError if it fails."""
+        if not self.flush():
+            raise SheetWriteError(f"{len(self)} buffered sheet write(s) could not be saved; "
+                                  f"they will be retried at exit")
+        atexit.unregister(self.flush)
+
+
 def get_contacted_businesses(service) -> list[dict]:
-    result = service.spreadsheets().values().get(
-        spreadsheetId=GOOGLE_SHEET_ID,
-        range=f"'{SHEET_ALL_BUSINESSES}'!A2:J1000"
-    ).execute()
-
-    rows = result.get("values", [])
-    contacted = []
-    for i, row in enumerate(rows):
-        row += [""] * (10 - len(row))
-        if row[6].strip().lower() == "contacted":
-            contacted.append({
-                "row_index":     i + 2,
-                "business_name": row[0],
-                "niche":         row[1],
-                "city":          row[2],
-                "source_url":    row[3],
-                "snippet":       row[4],
-                "email_address": row[8],
-                "notes":         row[9],
-            })
-    return contacted
\ No newline at end of file
+    mirror = get_mirror()
+    mirror.sync(service)
+    return mirror.by_status("contacted")